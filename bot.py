@@ -0,0 +1,1885 @@
+import os
+import asyncio
+import subprocess
+import platform
+from datetime import datetime, date, timedelta
+from zoneinfo import ZoneInfo
+from discord.ext import commands, tasks
+import discord
+from dotenv import load_dotenv, find_dotenv
+import sys
+import shutil
+import re
+import json
+import hashlib
+import time
+import threading
+import yt_dlp
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
+from discord import app_commands
+from io import BytesIO
+import queue
+from storage import create_storage
+from reminders import ReminderEngine
+from exports import (
+    build_todo_workbook, build_attendance_workbook, build_todo_csv, build_attendance_csv,
+    build_guild_attendance_workbook, drain, format_duration,
+)
+
+# =====================================================
+# FFMPEG AUTO-INSTALLER
+# =====================================================
+def check_ffmpeg():
+    return shutil.which("ffmpeg") is not None
+
+def install_ffmpeg():
+    system = platform.system()
+    if system != "Linux":
+        print(f"Automatic installation only supports Linux. Current system: {system}")
+        return False
+    print("FFmpeg not found. Attempting to install...")
+    try:
+        with open("/etc/os-release", "r") as f:
+            os_info = f.read().lower()
+        if "ubuntu" in os_info or "debian" in os_info:
+            subprocess.run(["sudo", "apt-get", "update"], check=True)
+            subprocess.run(["sudo", "apt-get", "install", "-y", "ffmpeg"], check=True)
+        elif "centos" in os_info or "rhel" in os_info or "fedora" in os_info:
+            subprocess.run(["sudo", "yum", "install", "-y", "ffmpeg"], check=True)
+        elif "arch" in os_info:
+            subprocess.run(["sudo", "pacman", "-S", "--noconfirm", "ffmpeg"], check=True)
+        else:
+            print("Unknown Linux distribution. Install FFmpeg manually.")
+            return False
+        print("FFmpeg installed successfully!")
+        return True
+    except Exception as e:
+        print(f"Error installing FFmpeg: {e}")
+        return False
+
+def ensure_ffmpeg():
+    if check_ffmpeg():
+        print("FFmpeg is already installed.")
+        return True
+    else:
+        success = install_ffmpeg()
+        if not success:
+            print("Bot requires FFmpeg. Install manually and restart.")
+            sys.exit(1)
+        return True
+
+ensure_ffmpeg()
+
+# === Load env & setup ===
+load_dotenv(find_dotenv(usecwd=True))  # .env di folder tempat bot dijalankan atau di atasnya
+TOKEN = os.getenv("DISCORD_TOKEN")
+FFMPEG_PATH = shutil.which("ffmpeg") or "ffmpeg"
+WIB = ZoneInfo("Asia/Jakarta")
+
+intents = discord.Intents.default()
+intents.message_content = True
+class TodoMusicBot(commands.Bot):
+    async def setup_hook(self):
+        # Sekali per proses, bukan di on_ready yang terpanggil lagi setiap reconnect gateway
+        await store.connect()
+        await store.migrate()
+        await load_open_sessions()
+
+    async def close(self):
+        # Drain buffer write-behind sebelum koneksi ditutup
+        await stop_history_writer()
+        await reminder_engine.stop()
+        await flush_history()
+        await flush_queue_snapshots()
+        await super().close()
+        await store.close()
+
+bot = TodoMusicBot(command_prefix='!', intents=intents)
+
+# =====================================================
+# Database (storage backend)
+# =====================================================
+# Semua akses DB lewat `store` (lihat storage/): backend MySQL atau PostgreSQL
+# dipilih di main() dari DB_BACKEND, sisa bot tidak tahu dialek SQL yang dipakai.
+store = None
+
+# =====================================================
+# Music Search Helper (worker pool yt-dlp)
+# =====================================================
+YTDLP_WORKERS = int(os.getenv("YTDLP_WORKERS", 4))
+YTDLP_GUILD_LIMIT = int(os.getenv("YTDLP_GUILD_LIMIT", 2))
+
+# Thread, bukan process pool: worker process (spawn/forkserver) meng-import ulang main.py -> bot
+# (cek ffmpeg, client Discord, scan cache audio), dan fork dari proses yang sudah punya thread tidak aman
+ytdlp_executor = ThreadPoolExecutor(max_workers=YTDLP_WORKERS, thread_name_prefix="ytdlp")
+
+_ytdlp_local = threading.local()  # instance YoutubeDL per worker
+EXTRACT_INFLIGHT = {}             # (query, opsi) -> Task ekstraksi yang sedang berjalan
+
+def ydl_options_key(ydl_opts):
+    return repr(sorted(ydl_opts.items()))
+
+async def search_ytdlp_async(query, ydl_opts, guild_id=None):
+    """Ekstraksi lewat pool khusus; query identik yang sedang berjalan cukup ditunggu bersama."""
+    key = (query, ydl_options_key(ydl_opts))
+    task = EXTRACT_INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_run_extract(query, ydl_opts, guild_id))
+        EXTRACT_INFLIGHT[key] = task
+        task.add_done_callback(lambda _: EXTRACT_INFLIGHT.pop(key, None))
+    return await asyncio.shield(task)
+
+async def _run_extract(query, ydl_opts, guild_id):
+    loop = asyncio.get_running_loop()
+    if guild_id is None:
+        return await loop.run_in_executor(ytdlp_executor, _extract, query, ydl_opts)
+    async with get_player(guild_id).extract_limit:
+        return await loop.run_in_executor(ytdlp_executor, _extract, query, ydl_opts)
+
+def _get_ydl(ydl_opts):
+    instances = getattr(_ytdlp_local, "instances", None)
+    if instances is None:
+        instances = _ytdlp_local.instances = {}
+    opts_key = ydl_options_key(ydl_opts)
+    ydl = instances.get(opts_key)
+    if ydl is None:
+        ydl = instances[opts_key] = yt_dlp.YoutubeDL(ydl_opts)
+    return ydl
+
+def _extract(query, ydl_opts):
+    return _get_ydl(ydl_opts).extract_info(query, download=False)
+
+# =====================================================
+# PLAYLIST STREAMING (flat & lazy)
+# =====================================================
+PLAYLIST_YDL_OPTIONS = {"extract_flat": "in_playlist", "lazy_playlist": True}
+# Pool terpisah: iterasi playlist bisa lama dan tidak boleh memakan slot ekstraksi /play
+playlist_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ytdlp-playlist")
+
+def _iter_playlist(playlist_url, emit, stopped):
+    """Iterasi entri playlist tanpa me-resolve stream; tiap entri langsung dikirim lewat emit."""
+    ydl = _get_ydl(PLAYLIST_YDL_OPTIONS)
+    info = ydl.extract_info(playlist_url, download=False, process=False)
+    for entry in info.get("entries") or []:
+        if stopped.is_set():
+            break
+        if entry and entry.get("id"):
+            emit({"video_id": entry["id"], "title": entry.get("title") or "Unknown Title"})
+
+async def stream_playlist_entries(playlist_url, stopped: threading.Event):
+    """Async generator entri playlist, muncul segera setelah yt-dlp menemukannya."""
+    loop = asyncio.get_running_loop()
+    found = asyncio.Queue()
+    done = object()
+
+    def produce():
+        try:
+            _iter_playlist(
+                playlist_url, lambda entry: loop.call_soon_threadsafe(found.put_nowait, entry), stopped
+            )
+        except Exception as e:
+            loop.call_soon_threadsafe(found.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(found.put_nowait, done)
+
+    loop.run_in_executor(playlist_executor, produce)
+    while True:
+        entry = await found.get()
+        if entry is done:
+            return
+        if isinstance(entry, Exception):
+            raise entry
+        yield entry
+
+# =====================================================
+# GUILD PLAYER STATE
+# =====================================================
+MAX_QUEUE_LENGTH = int(os.getenv("MAX_QUEUE_LENGTH", 100))
+PLAYER_IDLE_TIMEOUT = int(os.getenv("PLAYER_IDLE_TIMEOUT", 600))  # detik tanpa aktivitas & tanpa VC
+
+class Track:
+    """Satu entri antrean. url None berarti belum di-resolve (entri playlist)."""
+    __slots__ = ("video_id", "title", "url", "expire", "acodec", "requester_id")
+
+    def __init__(self, video_id, title, url=None, expire=0, acodec=None, requester_id=None):
+        self.video_id = video_id
+        self.title = title
+        self.url = url
+        self.expire = expire
+        self.acodec = acodec
+        self.requester_id = requester_id
+
+    @classmethod
+    def from_resolved(cls, track: dict, requester_id=None):
+        return cls(track["video_id"], track["title"], track["url"], track["expire"], track.get("acodec"), requester_id)
+
+    def update_stream(self, track: dict):
+        self.url = track["url"]
+        self.expire = track["expire"]
+        self.acodec = track.get("acodec")
+
+    def needs_resolve(self):
+        """URL belum ada atau hampir expire; lagu yang ada di cache disk tidak perlu URL."""
+        if AUDIO_CACHE_DIR and self.video_id in AUDIO_CACHE_INDEX:
+            return False
+        return self.url is None or self.expire - STREAM_URL_MARGIN <= time.time()
+
+class GuildPlayer:
+    """State musik satu guild: antrean, source hasil prefetch, dan waktu aktivitas terakhir."""
+    __slots__ = (
+        "guild_id", "queue", "prefetched", "resolving_next", "track_ended_at", "extract_limit",
+        "last_active", "load_task", "restored",
+    )
+
+    def __init__(self, guild_id: str):
+        self.guild_id = guild_id
+        self.queue = deque()
+        self.prefetched = None        # (audio_url, source) yang sudah disiapkan
+        self.resolving_next = False   # entri depan sedang di-resolve
+        self.track_ended_at = None    # perf_counter() saat lagu sebelumnya selesai
+        self.extract_limit = asyncio.Semaphore(YTDLP_GUILD_LIMIT)
+        self.last_active = time.monotonic()
+        self.load_task = None         # Task rehydrate antrean tersimpan; ditunggu semua pemanggil
+        self.restored = 0             # jumlah lagu hasil rehydrate yang belum diumumkan
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def enqueue(self, track: Track) -> bool:
+        if len(self.queue) >= MAX_QUEUE_LENGTH:
+            return False
+        self.queue.append(track)
+        self.mark_dirty()
+        return True
+
+    def pop_next(self) -> Track:
+        self.mark_dirty()
+        return self.queue.popleft()
+
+    def mark_dirty(self):
+        QUEUE_DIRTY.add(self.guild_id)
+
+    def take_prefetched(self, audio_url):
+        """Ambil source hasil prefetch jika masih cocok dengan lagu yang akan diputar."""
+        entry, self.prefetched = self.prefetched, None
+        if entry is None:
+            return None
+        prefetched_url, source = entry
+        if prefetched_url != audio_url:
+            source.cleanup()
+            return None
+        return source
+
+    def discard_prefetched(self):
+        entry, self.prefetched = self.prefetched, None
+        if entry:
+            entry[1].cleanup()
+
+    def reset(self):
+        self.queue.clear()
+        self.discard_prefetched()
+        self.track_ended_at = None
+        self.mark_dirty()
+
+GUILD_PLAYERS = {}  # str(guild_id) -> GuildPlayer
+
+def get_player(guild_id: str) -> GuildPlayer:
+    player = GUILD_PLAYERS.get(guild_id)
+    if player is None:
+        player = GUILD_PLAYERS[guild_id] = GuildPlayer(guild_id)
+    player.touch()
+    return player
+
+@tasks.loop(minutes=5)
+async def evict_idle_players():
+    """Buang state guild yang bot-nya sudah tidak di VC dan lama tidak dipakai."""
+    now = time.monotonic()
+    evicted = 0
+    for guild_id, player in list(GUILD_PLAYERS.items()):
+        guild = bot.get_guild(int(guild_id))
+        if guild and guild.voice_client and guild.voice_client.is_connected():
+            continue
+        if now - player.last_active < PLAYER_IDLE_TIMEOUT or guild_id in QUEUE_DIRTY:
+            continue
+        # Antrean tetap tersimpan di DB dan dimuat lagi saat guild dipakai
+        player.discard_prefetched()
+        del GUILD_PLAYERS[guild_id]
+        evicted += 1
+    if evicted:
+        print(f"[MUSIC] {evicted} state guild idle dibuang, tersisa {len(GUILD_PLAYERS)}.")
+
+# =====================================================
+# PERSISTENSI ANTREAN (write-behind)
+# =====================================================
+QUEUE_FLUSH_INTERVAL = int(os.getenv("QUEUE_FLUSH_INTERVAL", 5))  # detik
+QUEUE_DIRTY = set()  # str(guild_id) yang antreannya berubah sejak flush terakhir
+
+def serialize_queue(player: GuildPlayer) -> str:
+    return json.dumps([
+        {"video_id": t.video_id, "title": t.title, "url": t.url, "expire": t.expire,
+         "acodec": t.acodec, "requester_id": t.requester_id}
+        for t in player.queue if t.video_id
+    ])
+
+def deserialize_queue(queue_json: str):
+    return [Track(**item) for item in json.loads(queue_json)]
+
+async def restore_saved_queue(player: GuildPlayer):
+    try:
+        queue_json = await store.load_saved_queue(int(player.guild_id))
+    except Exception as e:
+        print(f"[ERROR] Gagal memuat antrean tersimpan {player.guild_id}: {e}")
+        return
+    if not queue_json:
+        return
+    # Antrean lama tetap di depan lagu yang sempat masuk lewat jalur lain selama load berjalan
+    restored = deserialize_queue(queue_json)[:max(MAX_QUEUE_LENGTH - len(player.queue), 0)]
+    player.queue.extendleft(reversed(restored))
+    player.restored = len(restored)
+    print(f"[MUSIC] {player.restored} lagu dipulihkan untuk guild {player.guild_id}")
+
+async def get_player_loaded(guild_id: str) -> GuildPlayer:
+    """get_player + rehydrate antrean tersimpan saat guild pertama kali disentuh.
+
+    Semua pemanggil menunggu Task load yang sama, jadi command kedua yang datang bersamaan
+    tidak bisa menambah lagu sebelum antrean lama dipulihkan.
+    """
+    player = get_player(guild_id)
+    if player.load_task is None:
+        player.load_task = asyncio.ensure_future(restore_saved_queue(player))
+    # shield: pemanggil yang dibatalkan tidak ikut membatalkan load untuk pemanggil lain
+    await asyncio.shield(player.load_task)
+    return player
+
+def take_restored_notice(player: GuildPlayer) -> str:
+    restored, player.restored = player.restored, 0
+    return f"♻️ {restored} lagu dari antrean sebelumnya dipulihkan.\n" if restored else ""
+
+async def flush_queue_snapshots():
+    """Tulis snapshot antrean yang berubah dalam satu batch; banyak mutasi per guild jadi satu tulis."""
+    if not QUEUE_DIRTY:
+        return
+    dirty = list(QUEUE_DIRTY)
+    QUEUE_DIRTY.clear()
+    upserts, deletes = [], []
+    for guild_id in dirty:
+        player = GUILD_PLAYERS.get(guild_id)
+        if player is None:
+            continue
+        if player.queue:
+            upserts.append((int(guild_id), serialize_queue(player)))
+        else:
+            deletes.append(int(guild_id))
+    try:
+        await store.save_queue_snapshots(upserts, deletes)
+    except Exception as e:
+        QUEUE_DIRTY.update(dirty)
+        print(f"[ERROR] Flush antrean gagal: {e}")
+
+@tasks.loop(seconds=QUEUE_FLUSH_INTERVAL)
+async def queue_flush_loop():
+    await flush_queue_snapshots()
+
+# =====================================================
+# PREFETCH LAGU BERIKUTNYA & METRIK JEDA
+# =====================================================
+FFMPEG_BEFORE_OPTIONS = "-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5 -reconnect_on_network_error 1"
+
+MUSIC_STATS = {
+    "gap_count": 0,
+    "gap_total_ms": 0.0,
+    "gap_last_ms": 0.0,
+    "prefetch_hit": 0,
+    "prefetch_miss": 0,
+    "passthrough": 0,
+    "transcoded": 0,
+    "audio_cache_hit": 0,
+    "audio_cache_miss": 0,
+    "search_cache_hit": 0,
+    "search_cache_refresh": 0,
+    "search_cache_miss": 0,
+}
+
+def stream_is_opus(audio_url, acodec=None):
+    """Format dari yt-dlp; untuk URL dari cache DB, lihat parameter mime googlevideo (webm = Opus)."""
+    if acodec:
+        return acodec == "opus"
+    mime = parse_qs(urlparse(audio_url).query).get("mime")
+    return bool(mime) and mime[0] == "audio/webm"
+
+def build_source(audio_url, acodec=None):
+    """Stream copy jika sumber sudah Opus, selain itu transcode ke libopus 96k."""
+    if stream_is_opus(audio_url, acodec):
+        return discord.FFmpegOpusAudio(
+            audio_url, codec="opus", before_options=FFMPEG_BEFORE_OPTIONS, options="-vn",
+            executable=FFMPEG_PATH
+        )
+    return discord.FFmpegOpusAudio(
+        audio_url, bitrate=96, before_options=FFMPEG_BEFORE_OPTIONS, options="-vn",
+        executable=FFMPEG_PATH
+    )
+
+def prefetch_next(guild_id: str):
+    """Spawn ffmpeg untuk lagu di depan antrean selagi lagu sekarang masih diputar."""
+    player = get_player(guild_id)
+    if not player.queue or player.prefetched:
+        return
+    track = player.queue[0]
+    if track.needs_resolve():
+        if not player.resolving_next:
+            player.resolving_next = True
+            asyncio.create_task(resolve_queue_head(player, track))
+        return
+    try:
+        player.prefetched = (track.url, open_track_source(track.url, track.acodec, track.video_id))
+        print(f"[MUSIC] Prefetch: {track.title}")
+    except Exception as e:
+        print(f"[ERROR] Prefetch gagal: {e}")
+
+async def resolve_queue_head(player: GuildPlayer, track: Track):
+    """Resolve URL stream lagu di depan antrean (entri playlist / URL basi), lalu lanjutkan prefetch."""
+    try:
+        resolved = await resolve_video(track.video_id, player.guild_id)
+    except Exception as e:
+        print(f"[ERROR] Resolve lagu berikutnya gagal: {e}")
+        return
+    finally:
+        player.resolving_next = False
+    if resolved:
+        track.update_stream(resolved)
+        if player.queue and player.queue[0] is track:
+            prefetch_next(player.guild_id)
+
+def record_gap(player: GuildPlayer):
+    ended_at, player.track_ended_at = player.track_ended_at, None
+    if ended_at is None:
+        return
+    gap_ms = (time.perf_counter() - ended_at) * 1000
+    MUSIC_STATS["gap_count"] += 1
+    MUSIC_STATS["gap_total_ms"] += gap_ms
+    MUSIC_STATS["gap_last_ms"] = gap_ms
+    print(f"[MUSIC] Jeda antar lagu: {gap_ms:.0f} ms")
+
+# =====================================================
+# AUDIO DISK CACHE (file Opus per video ID, LRU)
+# =====================================================
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", "")  # kosong = nonaktif
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_MB", 1024)) * 1024 * 1024
+AUDIO_CACHE_INDEX = OrderedDict()  # video_id -> ukuran file, urutan = recency
+AUDIO_CACHE_FILLING = set()        # video_id yang sedang diunduh
+AUDIO_CACHE_FILL_LIMIT = asyncio.Semaphore(2)
+audio_cache_bytes = 0
+
+def load_audio_cache_index():
+    """Bangun index LRU dari isi folder cache (mtime = terakhir diputar)."""
+    global audio_cache_bytes
+    if not AUDIO_CACHE_DIR:
+        return
+    os.makedirs(AUDIO_CACHE_DIR, exist_ok=True)
+    entries = []
+    for name in os.listdir(AUDIO_CACHE_DIR):
+        path = os.path.join(AUDIO_CACHE_DIR, name)
+        if name.endswith(".part"):
+            os.remove(path)
+        elif name.endswith(".opus"):
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, name[:-len(".opus")], stat.st_size))
+    for _, video_id, size in sorted(entries):
+        AUDIO_CACHE_INDEX[video_id] = size
+        audio_cache_bytes += size
+    print(f"[CACHE] Audio cache: {len(AUDIO_CACHE_INDEX)} file, {audio_cache_bytes / 1024 / 1024:.1f} MB")
+
+def audio_cache_path(video_id):
+    return os.path.join(AUDIO_CACHE_DIR, f"{video_id}.opus")
+
+def cached_audio_path(video_id):
+    """Path file lokal jika lagu ada di cache (sekaligus menandai baru dipakai)."""
+    if not AUDIO_CACHE_DIR or video_id not in AUDIO_CACHE_INDEX:
+        return None
+    path = audio_cache_path(video_id)
+    if not os.path.exists(path):
+        forget_cached_audio(video_id)
+        return None
+    AUDIO_CACHE_INDEX.move_to_end(video_id)
+    os.utime(path)
+    return path
+
+def forget_cached_audio(video_id):
+    global audio_cache_bytes
+    size = AUDIO_CACHE_INDEX.pop(video_id, None)
+    if size is not None:
+        audio_cache_bytes -= size
+
+def evict_audio_cache():
+    while audio_cache_bytes > AUDIO_CACHE_MAX_BYTES and AUDIO_CACHE_INDEX:
+        video_id = next(iter(AUDIO_CACHE_INDEX))
+        forget_cached_audio(video_id)
+        try:
+            os.remove(audio_cache_path(video_id))
+        except FileNotFoundError:
+            pass
+        print(f"[CACHE] Evict audio: {video_id}")
+
+def open_track_source(audio_url, acodec, video_id):
+    """Putar dari disk jika ada di cache, selain itu stream dari YouTube."""
+    local_path = cached_audio_path(video_id)
+    if local_path:
+        return discord.FFmpegOpusAudio(local_path, codec="opus", options="-vn", executable=FFMPEG_PATH)
+    return build_source(audio_url, acodec)
+
+def schedule_audio_cache_fill(video_id, audio_url, acodec):
+    if not AUDIO_CACHE_DIR or not video_id or not VIDEO_ID_PATTERN.fullmatch(video_id):
+        return
+    if video_id in AUDIO_CACHE_INDEX or video_id in AUDIO_CACHE_FILLING:
+        return
+    AUDIO_CACHE_FILLING.add(video_id)
+    asyncio.create_task(fill_audio_cache(video_id, audio_url, acodec))
+
+async def fill_audio_cache(video_id, audio_url, acodec):
+    """Unduh & simpan sebagai Opus di background; ditulis ke .part lalu di-rename."""
+    global audio_cache_bytes
+    final_path = audio_cache_path(video_id)
+    tmp_path = final_path + ".part"
+    if stream_is_opus(audio_url, acodec):
+        codec_args = ["-c:a", "copy"]
+    else:
+        codec_args = ["-c:a", "libopus", "-b:a", "96k"]
+    try:
+        async with AUDIO_CACHE_FILL_LIMIT:
+            proc = await asyncio.create_subprocess_exec(
+                FFMPEG_PATH, "-nostdin", "-loglevel", "error", *FFMPEG_BEFORE_OPTIONS.split(),
+                "-i", audio_url, "-vn", *codec_args, "-f", "opus", "-y", tmp_path,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            returncode = await proc.wait()
+        if returncode != 0:
+            print(f"[CACHE] Gagal cache audio {video_id} (ffmpeg exit {returncode})")
+            return
+        os.replace(tmp_path, final_path)
+        size = os.path.getsize(final_path)
+        AUDIO_CACHE_INDEX[video_id] = size
+        audio_cache_bytes += size
+        evict_audio_cache()
+    except Exception as e:
+        print(f"[CACHE] Gagal cache audio {video_id}: {e}")
+    finally:
+        AUDIO_CACHE_FILLING.discard(video_id)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+load_audio_cache_index()
+
+# =====================================================
+# SEARCH CACHE (LRU memori + tabel ytdlp_cache)
+# =====================================================
+SEARCH_CACHE = OrderedDict()  # cache_key() -> {"video_id", "title", "url", "expire"}
+SEARCH_CACHE_MAX = int(os.getenv("SEARCH_CACHE_MAX", 1000))
+STREAM_URL_MARGIN = 300        # detik; URL googlevideo dianggap basi sebelum benar-benar expire
+STREAM_URL_DEFAULT_TTL = 3600  # dipakai jika URL tidak membawa parameter expire
+VIDEO_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+YDL_OPTIONS = {"format": "bestaudio[acodec=opus][abr<=96]/bestaudio[abr<=96]/bestaudio", "noplaylist": True}
+
+YOUTUBE_HOSTS = {"youtube.com", "www.youtube.com", "m.youtube.com", "music.youtube.com"}
+CACHE_KEY_MAX = 255  # panjang kolom ytdlp_cache.query_key
+
+def normalize_query(song_query: str) -> str:
+    return " ".join(song_query.lower().split())
+
+def bounded_key(key: str) -> str:
+    """Key yang terlalu panjang di-hash utuh, bukan dipotong: dua query yang hanya sama di
+    255 karakter pertama tidak boleh berbagi entri cache."""
+    if len(key) <= CACHE_KEY_MAX:
+        return key
+    return "sha1:" + hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+def youtube_video_id(song_query: str):
+    """Video ID dari URL youtube.com/watch, /shorts/ atau youtu.be; None untuk selain itu."""
+    parsed = urlparse(song_query.strip())
+    host = (parsed.hostname or "").lower()
+    if host == "youtu.be":
+        candidate = parsed.path.lstrip("/").split("/")[0]
+    elif host in YOUTUBE_HOSTS and parsed.path == "/watch":
+        candidate = parse_qs(parsed.query).get("v", [""])[0]
+    elif host in YOUTUBE_HOSTS and parsed.path.startswith("/shorts/"):
+        candidate = parsed.path.split("/")[2]
+    else:
+        return None
+    return candidate if VIDEO_ID_PATTERN.fullmatch(candidate) else None
+
+def cache_key(song_query: str) -> str:
+    """Key SEARCH_CACHE/ytdlp_cache. Video ID YouTube peka huruf besar-kecil, jadi URL video
+    di-key dengan ID apa adanya; URL lain apa adanya; hanya teks pencarian yang dinormalisasi."""
+    video_id = youtube_video_id(song_query)
+    if video_id:
+        return f"vid:{video_id}"
+    if song_query.startswith(("http://", "https://")):
+        return bounded_key("url:" + song_query.strip())
+    return bounded_key(normalize_query(song_query))
+
+def stream_expiry(audio_url: str) -> int:
+    expire = parse_qs(urlparse(audio_url).query).get("expire")
+    if expire and expire[0].isdigit():
+        return int(expire[0])
+    return int(time.time()) + STREAM_URL_DEFAULT_TTL
+
+def track_from_info(info: dict) -> dict:
+    return {
+        "video_id": info.get("id"),
+        "title": info.get("title", "Unknown Title"),
+        "url": info["url"],
+        "expire": stream_expiry(info["url"]),
+        "acodec": info.get("acodec"),
+    }
+
+def remember_track(query_key: str, track: dict):
+    SEARCH_CACHE[query_key] = track
+    SEARCH_CACHE.move_to_end(query_key)
+    while len(SEARCH_CACHE) > SEARCH_CACHE_MAX:
+        SEARCH_CACHE.popitem(last=False)
+
+async def save_cached_track(query_key: str, track: dict):
+    # Tier DB hanya best-effort: lagu sudah ter-resolve, gagal simpan cukup dicatat
+    try:
+        await store.save_cached_track(query_key, track)
+    except Exception as e:
+        print(f"[CACHE] Gagal menyimpan ytdlp_cache '{query_key}': {e}")
+
+async def resolve_track(song_query: str, guild_id=None):
+    """Cari lagu lewat cache dulu; URL stream yang basi di-resolve ulang dari video ID."""
+    query_key = cache_key(song_query)
+    track = SEARCH_CACHE.get(query_key)
+    if track is None:
+        try:
+            track = await store.load_cached_track(query_key)
+        except Exception as e:
+            print(f"[CACHE] Gagal membaca ytdlp_cache '{query_key}', lanjut ke yt-dlp: {e}")
+
+    if track and track["expire"] - STREAM_URL_MARGIN > time.time():
+        MUSIC_STATS["search_cache_hit"] += 1
+        remember_track(query_key, track)
+        return track
+
+    if track and track["video_id"]:
+        MUSIC_STATS["search_cache_refresh"] += 1
+        info = await search_ytdlp_async(
+            f"https://www.youtube.com/watch?v={track['video_id']}", YDL_OPTIONS, guild_id
+        )
+    else:
+        MUSIC_STATS["search_cache_miss"] += 1
+        is_url = song_query.startswith(("http://", "https://"))
+        info = await search_ytdlp_async(song_query if is_url else "ytsearch1:" + song_query, YDL_OPTIONS, guild_id)
+        if "entries" in info:
+            entries = info.get("entries") or []
+            if not entries:
+                return None
+            info = entries[0]
+
+    track = track_from_info(info)
+    remember_track(query_key, track)
+    asyncio.create_task(save_cached_track(query_key, track))  # tidak menahan balasan /play
+    return track
+
+async def resolve_video(video_id: str, guild_id=None):
+    return await resolve_track(f"https://www.youtube.com/watch?v={video_id}", guild_id)
+
+# =====================================================
+# HISTORY WRITE-BEHIND BUFFER
+# =====================================================
+HISTORY_FLUSH_SIZE = int(os.getenv("HISTORY_FLUSH_SIZE", 50))
+HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", 2))  # detik
+HISTORY_BUFFER_MAX = 10000  # batas saat DB mati lama; baris paling lama dibuang
+HISTORY_BUFFER = []  # (guild_id, user_id, title, url, action, created_at)
+history_flush_needed = asyncio.Event()
+history_writer_task = None
+history_writer_stopping = False
+
+def record_history(rows):
+    """Dipanggil dari hot path command: hanya append ke buffer, tanpa menunggu DB."""
+    HISTORY_BUFFER.extend(rows)
+    if len(HISTORY_BUFFER) > HISTORY_BUFFER_MAX:
+        del HISTORY_BUFFER[:len(HISTORY_BUFFER) - HISTORY_BUFFER_MAX]
+    if len(HISTORY_BUFFER) >= HISTORY_FLUSH_SIZE:
+        history_flush_needed.set()
+
+async def flush_history():
+    if not HISTORY_BUFFER:
+        return
+    rows = HISTORY_BUFFER[:]
+    HISTORY_BUFFER.clear()
+    try:
+        await store.insert_music_history(rows)
+    except Exception as e:
+        HISTORY_BUFFER[:0] = rows
+        print(f"[ERROR] Flush music_history gagal ({len(rows)} baris ditahan): {e}")
+
+async def history_writer():
+    """Flush saat buffer mencapai HISTORY_FLUSH_SIZE atau tiap HISTORY_FLUSH_INTERVAL detik."""
+    while True:
+        try:
+            await asyncio.wait_for(history_flush_needed.wait(), HISTORY_FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        history_flush_needed.clear()
+        await flush_history()
+        if history_writer_stopping:
+            return
+
+def start_history_writer():
+    global history_writer_task, history_writer_stopping
+    history_writer_stopping = False
+    if history_writer_task is None or history_writer_task.done():
+        history_writer_task = asyncio.create_task(history_writer())
+
+async def stop_history_writer():
+    """Hentikan writer lewat flag, bukan cancel(): cancel di tengah insert_music_history
+    membuang batch yang sudah diambil dari buffer."""
+    global history_writer_stopping
+    history_writer_stopping = True
+    history_flush_needed.set()
+    if history_writer_task is not None:
+        await history_writer_task
+
+# =====================================================
+# TIMING /play PER TAHAP
+# =====================================================
+PLAY_TIMINGS = {}  # tahap -> [jumlah, total_ms]
+
+async def timed(stage: str, timings: dict, coro):
+    start = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        timings[stage] = (time.perf_counter() - start) * 1000
+
+def record_play_timings(timings: dict):
+    for stage, ms in timings.items():
+        entry = PLAY_TIMINGS.setdefault(stage, [0, 0.0])
+        entry[0] += 1
+        entry[1] += ms
+    print("[MUSIC] /play timing " + " ".join(f"{stage}={ms:.0f}ms" for stage, ms in timings.items()))
+
+# =====================================================
+# PLAY COMMAND
+# =====================================================
+@bot.tree.command(name="play", description="Putar lagu atau tambahkan ke antrean.")
+@app_commands.describe(song_query="Judul lagu atau URL YouTube")
+async def play(interaction: discord.Interaction, song_query: str):
+    await interaction.response.defer()
+
+    if not interaction.user.voice or not interaction.user.voice.channel:
+        return await interaction.followup.send("Kamu harus berada di voice channel.")
+
+    voice_channel = interaction.user.voice.channel
+    voice_client = interaction.guild.voice_client
+    play_started = time.perf_counter()
+    timings = {}
+
+    # Handshake voice dan pencarian yt-dlp berjalan bersamaan
+    just_connected = voice_client is None
+    if just_connected:
+        voice_step = voice_channel.connect()
+    elif voice_channel != voice_client.channel:
+        voice_step = voice_client.move_to(voice_channel)
+    else:
+        voice_step = asyncio.sleep(0)
+
+    voice_result, track = await asyncio.gather(
+        timed("voice", timings, voice_step),
+        timed("search", timings, resolve_track(song_query, str(interaction.guild_id))),
+        return_exceptions=True
+    )
+
+    if isinstance(track, Exception) or not track:
+        # Jangan biarkan bot nongkrong di VC yang baru saja dimasuki tanpa lagu
+        if just_connected and isinstance(voice_result, discord.VoiceClient):
+            await voice_result.disconnect()
+        if isinstance(track, Exception):
+            return await interaction.followup.send("Gagal mencari lagu. Coba lagi.")
+        return await interaction.followup.send("Lagu tidak ditemukan.")
+
+    if isinstance(voice_result, Exception):
+        print(f"[ERROR] Gagal join voice: {voice_result}")
+        return await interaction.followup.send("Gagal masuk ke voice channel. Coba lagi.")
+    if just_connected:
+        voice_client = voice_result
+
+    audio_url = track["url"]
+    title = track["title"]
+
+    guild_id = str(interaction.guild_id)
+    player = await get_player_loaded(guild_id)
+    if not player.enqueue(Track.from_resolved(track, interaction.user.id)):
+        return await interaction.followup.send(f"📛 Antrean penuh (maksimal {MAX_QUEUE_LENGTH} lagu).")
+    restored_notice = take_restored_notice(player)
+
+    # Simpan ke DB; lagu hanya langsung diputar jika player idle dan tidak ada antrean yang dipulihkan
+    was_idle = not (voice_client.is_playing() or voice_client.is_paused())
+    action = "played" if was_idle and not restored_notice else "queued"
+    record_history([(interaction.guild_id, interaction.user.id, title, audio_url, action, datetime.now(WIB))])
+
+    if voice_client.is_playing() or voice_client.is_paused():
+        prefetch_next(guild_id)
+        await interaction.followup.send(f"{restored_notice}Ditambahkan ke antrean: **{title}**")
+    elif restored_notice:
+        await interaction.followup.send(f"{restored_notice}Ditambahkan ke antrean: **{title}**")
+        await play_next_song(voice_client, guild_id, interaction.channel)
+    else:
+        await interaction.followup.send(f"Memutar sekarang: **{title}**")
+        await play_next_song(voice_client, guild_id, interaction.channel)
+    timings["total"] = (time.perf_counter() - play_started) * 1000
+    record_play_timings(timings)
+
+@bot.tree.command(name="playlist", description="Putar playlist YouTube; lagu masuk antrean bertahap.")
+@app_commands.describe(playlist_url="URL playlist YouTube")
+async def playlist(interaction: discord.Interaction, playlist_url: str):
+    await interaction.response.defer()
+
+    if not interaction.user.voice or not interaction.user.voice.channel:
+        return await interaction.followup.send("Kamu harus berada di voice channel.")
+
+    voice_channel = interaction.user.voice.channel
+    voice_client = interaction.guild.voice_client
+
+    just_connected = voice_client is None
+    if just_connected:
+        voice_client = await voice_channel.connect()
+    elif voice_channel != voice_client.channel:
+        await voice_client.move_to(voice_channel)
+
+    guild_id = str(interaction.guild_id)
+    player = await get_player_loaded(guild_id)
+    restored_notice = take_restored_notice(player)
+    added = 0
+    stopped = threading.Event()
+
+    try:
+        async for entry in stream_playlist_entries(playlist_url, stopped):
+            # URL stream di-resolve nanti, tepat sebelum lagu diputar
+            if not player.enqueue(Track(entry["video_id"], entry["title"], requester_id=interaction.user.id)):
+                stopped.set()
+                await interaction.channel.send(f"📛 Antrean penuh (maksimal {MAX_QUEUE_LENGTH} lagu), sisa playlist dilewati.")
+                break
+            added += 1
+            if added == 1:
+                if voice_client.is_playing() or voice_client.is_paused():
+                    await interaction.followup.send(f"{restored_notice}📃 Playlist ditambahkan ke antrean, mulai dari **{entry['title']}**...")
+                else:
+                    await interaction.followup.send(f"{restored_notice}📃 Memutar playlist, mulai dari **{entry['title']}**...")
+                    await play_next_song(voice_client, guild_id, interaction.channel)
+            elif added == 2 and voice_client.is_playing():
+                prefetch_next(guild_id)
+    except Exception as e:
+        stopped.set()
+        print(f"[ERROR] Playlist gagal: {e}")
+        if not added:
+            # Sama seperti /play: jangan tinggal di VC yang baru dimasuki tanpa lagu
+            if just_connected:
+                await voice_client.disconnect()
+            return await interaction.followup.send("Gagal membaca playlist. Pastikan URL benar.")
+
+    if not added:
+        if just_connected:
+            await voice_client.disconnect()
+        return await interaction.followup.send("Playlist kosong atau tidak ditemukan.")
+    await interaction.channel.send(f"✅ {added} lagu dari playlist masuk antrean.")
+
+# =====================================================
+# PLAYMANY (banyak judul sekaligus)
+# =====================================================
+PLAYMANY_MAX_QUERIES = 10
+PLAYMANY_RESOLVE_LIMIT = int(os.getenv("PLAYMANY_RESOLVE_LIMIT", 4))
+
+async def resolve_tracks_bounded(queries, guild_id):
+    """Resolve semua query paralel (dibatasi semaphore); urutan hasil = urutan input."""
+    limit = asyncio.Semaphore(PLAYMANY_RESOLVE_LIMIT)
+
+    async def resolve_one(query):
+        async with limit:
+            try:
+                return await resolve_track(query, guild_id)
+            except Exception as e:
+                print(f"[ERROR] Gagal mencari '{query}': {e}")
+                return None
+
+    return await asyncio.gather(*(resolve_one(q) for q in queries))
+
+@bot.tree.command(name="playmany", description="Tambahkan beberapa lagu sekaligus (pisahkan dengan ;).")
+@app_commands.describe(song_queries="Judul/URL lagu, dipisah titik koma. Contoh: lagu a; lagu b; lagu c")
+async def playmany(interaction: discord.Interaction, song_queries: str):
+    await interaction.response.defer()
+
+    if not interaction.user.voice or not interaction.user.voice.channel:
+        return await interaction.followup.send("Kamu harus berada di voice channel.")
+
+    queries = [q.strip() for q in song_queries.split(";") if q.strip()][:PLAYMANY_MAX_QUERIES]
+    if not queries:
+        return await interaction.followup.send("Masukkan minimal satu judul lagu.")
+
+    voice_channel = interaction.user.voice.channel
+    voice_client = interaction.guild.voice_client
+    guild_id = str(interaction.guild_id)
+
+    just_connected = voice_client is None
+    if just_connected:
+        voice_step = voice_channel.connect()
+    elif voice_channel != voice_client.channel:
+        voice_step = voice_client.move_to(voice_channel)
+    else:
+        voice_step = asyncio.sleep(0)
+
+    voice_result, tracks = await asyncio.gather(
+        voice_step, resolve_tracks_bounded(queries, guild_id), return_exceptions=True
+    )
+    found = [t for t in tracks if t] if not isinstance(tracks, Exception) else []
+
+    if not found:
+        if just_connected and isinstance(voice_result, discord.VoiceClient):
+            await voice_result.disconnect()
+        return await interaction.followup.send("Tidak ada lagu yang ditemukan.")
+    if isinstance(voice_result, Exception):
+        print(f"[ERROR] Gagal join voice: {voice_result}")
+        return await interaction.followup.send("Gagal masuk ke voice channel. Coba lagi.")
+    if just_connected:
+        voice_client = voice_result
+
+    player = await get_player_loaded(guild_id)
+    restored_notice = take_restored_notice(player)
+    was_idle = not (voice_client.is_playing() or voice_client.is_paused())
+    now = datetime.now(WIB)
+    history_rows = []
+    queued = []
+    for i, track in enumerate(found):
+        if not player.enqueue(Track.from_resolved(track, interaction.user.id)):
+            break
+        queued.append(track)
+        action = "played" if was_idle and i == 0 and not restored_notice else "queued"
+        history_rows.append((interaction.guild_id, interaction.user.id, track["title"], track["url"], action, now))
+    record_history(history_rows)
+
+    if not queued:
+        return await interaction.followup.send(f"📛 Antrean penuh (maksimal {MAX_QUEUE_LENGTH} lagu).")
+
+    lines = [f"{restored_notice}📥 {len(queued)} lagu ditambahkan ke antrean:"]
+    lines += [f"{i}. {track['title']}" for i, track in enumerate(queued, start=1)]
+    missing = len(queries) - len(found)
+    if missing:
+        lines.append(f"⚠️ {missing} judul tidak ditemukan.")
+    if len(queued) < len(found):
+        lines.append(f"📛 Antrean penuh, {len(found) - len(queued)} lagu tidak dimasukkan.")
+    await interaction.followup.send("\n".join(lines))
+
+    if was_idle:
+        await play_next_song(voice_client, guild_id, interaction.channel)
+    else:
+        prefetch_next(guild_id)
+
+@bot.event
+async def on_voice_state_update(member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+    if member.id == bot.user.id and before.channel and after.channel:
+        vc = member.guild.voice_client
+        if vc and not vc.is_playing() and not vc.is_paused():
+            guild_id = str(member.guild.id)
+            if get_player(guild_id).queue:
+                channel = discord.utils.get(member.guild.text_channels, name="general") or member.guild.text_channels[0]
+                await play_next_song(vc, guild_id, channel)
+            else:
+                await asyncio.sleep(5)
+                if vc and not vc.is_playing():
+                    await vc.disconnect()
+
+# =====================================================
+# PLAY NEXT SONG
+# =====================================================
+async def play_next_song(voice_client: discord.VoiceClient, guild_id: str, channel: discord.TextChannel):
+    player = get_player(guild_id)
+
+    if not player.queue:
+        player.track_ended_at = None
+        player.discard_prefetched()
+        await channel.send("📭 Antrean selesai. Bot keluar dari VC.")
+        if voice_client.is_connected():
+            await voice_client.disconnect()
+        return
+
+    try:
+        track = player.pop_next()
+        title = track.title
+        print(f"[MUSIC] Playing: {title}")
+
+        if track.needs_resolve():
+            # Entri playlist yang belum sempat di-resolve, atau URL stream yang keburu basi
+            track.update_stream(await resolve_video(track.video_id, guild_id))
+        audio_url, acodec, video_id = track.url, track.acodec, track.video_id
+
+        source = player.take_prefetched(audio_url)
+        if source is None:
+            MUSIC_STATS["prefetch_miss"] += 1
+            source = open_track_source(audio_url, acodec, video_id)
+        else:
+            MUSIC_STATS["prefetch_hit"] += 1
+
+        if AUDIO_CACHE_DIR and video_id in AUDIO_CACHE_INDEX:
+            MUSIC_STATS["audio_cache_hit"] += 1
+            MUSIC_STATS["passthrough"] += 1
+        else:
+            if AUDIO_CACHE_DIR:
+                MUSIC_STATS["audio_cache_miss"] += 1
+            MUSIC_STATS["passthrough" if stream_is_opus(audio_url, acodec) else "transcoded"] += 1
+            schedule_audio_cache_fill(video_id, audio_url, acodec)
+
+        def after_play(error):
+            if error:
+                print(f"[ERROR] Playback failed: {error}")
+            player.track_ended_at = time.perf_counter()
+            asyncio.run_coroutine_threadsafe(
+                play_next_song(voice_client, guild_id, channel), 
+                bot.loop
+            )
+
+        voice_client.play(source, after=after_play)
+        record_gap(player)
+        prefetch_next(guild_id)
+        await channel.send(f"🎵 **Sekarang memutar: {title}**")
+
+    except Exception as e:
+        print(f"[CRITICAL] Play failed: {e}")
+        await channel.send("❌ Gagal memutar lagu. Skip ke next.")
+        await play_next_song(voice_client, guild_id, channel)
+
+# =====================================================
+# STOP, HISTORY, NEXT
+# =====================================================
+@bot.tree.command(name="stop", description="Hentikan musik dan disconnect.")
+async def stop(interaction: discord.Interaction):
+    voice_client = interaction.guild.voice_client
+    if not voice_client:
+        return await interaction.response.send_message("Bot tidak di voice channel.")
+
+    guild_id = str(interaction.guild_id)
+    get_player(guild_id).reset()
+
+    if voice_client.is_playing():
+        voice_client.stop()
+    await voice_client.disconnect()
+    await interaction.response.send_message("Musik dihentikan dan bot keluar.")
+
+@bot.tree.command(name="history", description="Lihat riwayat musik server ini.")
+async def history(interaction: discord.Interaction):
+    await flush_history()  # supaya lagu yang baru di-/play ikut tampil
+    rows = await store.recent_music_history(interaction.guild_id, 10)
+
+    if not rows:
+        return await interaction.response.send_message("📭 Belum ada lagu yang pernah diputar di server ini.")
+
+    msg_lines = ["🎧 **Riwayat 10 Lagu Terakhir:**\n"]
+
+    for r in rows:
+        waktu = r["created_at"].strftime("%Y-%m-%d %H:%M:%S")
+        icon = "▶️" if r["action"] == "played" else "➕"
+        title = r["title"]
+        if len(title) > 60:
+            title = title[:57] + "..."
+
+        msg_lines.append(
+            f"━━━━━━━━━━━━━━━━━━━━━━━\n"
+            f"{icon} **Lagu:** {title}\n"
+            f"📀 **Status:** {r['action'].capitalize()}\n"
+            f"🕒 **Waktu:** {waktu} WIB"
+        )
+
+    msg_text = "\n".join(msg_lines)
+    await interaction.response.send_message(msg_text)
+
+@bot.tree.command(name="next", description="Skip lagu sekarang dan putar lagu berikutnya.")
+async def next(interaction: discord.Interaction):
+    voice_client = interaction.guild.voice_client
+    guild_id = str(interaction.guild_id)
+    channel = interaction.channel
+
+    if not voice_client or not voice_client.is_connected():
+        return await interaction.response.send_message("❌ Bot tidak sedang di voice channel.", ephemeral=True)
+
+    if not (await get_player_loaded(guild_id)).queue:
+        return await interaction.response.send_message("📭 Tidak ada lagu berikutnya dalam antrean.", ephemeral=True)
+
+    if voice_client.is_playing():
+        voice_client.stop()
+        await interaction.response.send_message("⏭️ Lagu dilewati, memutar lagu berikutnya...")
+    else:
+        await interaction.response.send_message("⏭️ Tidak sedang memutar lagu, mencoba lanjut ke berikutnya...")
+        await play_next_song(voice_client, guild_id, channel)
+
+# =====================================================
+# TODO CACHE (read-through, LRU + TTL)
+# =====================================================
+TODO_CACHE_MAX = int(os.getenv("TODO_CACHE_MAX", 5000))
+TODO_CACHE_TTL = int(os.getenv("TODO_CACHE_TTL", 300))  # detik
+
+class LocalTTLCache:
+    """Cache LRU + TTL di memori proses.
+
+    Interface-nya async (get/set/delete) dengan key string, supaya bisa diganti cache
+    bersama (mis. Redis) untuk deployment multi-proses tanpa mengubah pemanggil.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    async def set(self, key, value):
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def delete(self, *keys):
+        for key in keys:
+            if self.entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+todo_cache = LocalTTLCache(TODO_CACHE_MAX, TODO_CACHE_TTL)
+
+def todo_list_key(user_id, task_date):
+    return f"todos:{user_id}:{task_date.isoformat()}"
+
+def todo_dates_key(user_id):
+    return f"todo_dates:{user_id}"
+
+async def cached_read(key, user_id, load):
+    rows = await todo_cache.get(key)
+    if rows is None:
+        version = data_version("todos", user_id)
+        rows = await load()
+        # Ada penulisan selama load berjalan: hasilnya mungkin basi, jangan disimpan
+        if data_version("todos", user_id) == version:
+            await todo_cache.set(key, rows)
+    return rows
+
+async def invalidate_todos(user_id, task_date):
+    """Dipanggil setelah /add, /done, /delete, /clear: hanya tanggal yang berubah + ringkasan /dates."""
+    bump_data_version("todos", user_id)  # sebelum delete, supaya cached_read yang sedang jalan tidak menyimpan
+    await todo_cache.delete(todo_list_key(user_id, task_date), todo_dates_key(user_id))
+
+# =====================================================
+# TODO COMMANDS
+# =====================================================
+@bot.tree.command(name="add", description="Tambah tugas ke daftar to-do kamu.")
+@app_commands.describe(date_str="Tanggal (YYYY-MM-DD, opsional)", task="Deskripsi tugas")
+async def add(interaction: discord.Interaction, task: str, date_str: str = ""):
+    user_id = interaction.user.id
+    now = datetime.now(WIB)
+
+    try:
+        task_date = datetime.strptime(date_str, "%Y-%m-%d").date() if date_str else now.date()
+    except ValueError:
+        return await interaction.response.send_message("⚠️ Format tanggal salah. Gunakan YYYY-MM-DD.", ephemeral=True)
+
+    await store.add_todo(user_id, task_date, task, now)
+    await invalidate_todos(user_id, task_date)
+    await interaction.response.send_message(f"📝 Ditambahkan: **{task}** untuk **{task_date}**")
+
+@bot.tree.command(name="list", description="Tampilkan daftar tugas kamu.")
+@app_commands.describe(date_str="Tanggal (YYYY-MM-DD, opsional)")
+async def list_tasks(interaction: discord.Interaction, date_str: str = ""):
+    user_id = interaction.user.id
+    now = datetime.now(WIB)
+    today = now.date()
+
+    try:
+        target_date = datetime.strptime(date_str, "%Y-%m-%d").date() if date_str else today
+    except ValueError:
+        return await interaction.response.send_message("⚠️ Format tanggal tidak valid.", ephemeral=True)
+
+    rows = await cached_read(todo_list_key(user_id, target_date), user_id, lambda: store.list_todos(user_id, target_date))
+
+    if not rows:
+        return await interaction.response.send_message(f"✨ Tidak ada tugas untuk **{target_date}**.")
+
+    msg = [f"📅 **Tugas untuk {target_date}:**"]
+    for row in rows:
+        status = "✅" if row["done"] else "☐"
+        msg.append(f"{status} {row['task']} (ID: {row['id']})")
+
+    await interaction.response.send_message("\n".join(msg))
+
+@bot.tree.command(name="done", description="Tandai tugas sebagai selesai.")
+@app_commands.describe(task_id="ID tugas yang ingin ditandai selesai")
+async def done(interaction: discord.Interaction, task_id: int):
+    user_id = interaction.user.id
+    task_date = await store.set_todo_done(user_id, task_id)
+    if task_date:
+        await invalidate_todos(user_id, task_date)
+        await interaction.response.send_message(f"✅ Tugas dengan ID {task_id} telah selesai!")
+    else:
+        await interaction.response.send_message("❌ ID tugas tidak ditemukan.")
+
+@bot.tree.command(name="delete", description="Hapus tugas berdasarkan ID.")
+@app_commands.describe(task_id="ID tugas yang ingin dihapus")
+async def delete(interaction: discord.Interaction, task_id: int):
+    user_id = interaction.user.id
+    task_date = await store.delete_todo(user_id, task_id)
+    if task_date:
+        await invalidate_todos(user_id, task_date)
+        await interaction.response.send_message(f"🗑️ Tugas dengan ID {task_id} telah dihapus.")
+    else:
+        await interaction.response.send_message("❌ ID tugas tidak ditemukan.")
+
+@bot.tree.command(name="clear", description="Hapus semua tugas untuk tanggal tertentu (default: hari ini).")
+@app_commands.describe(date_str="Tanggal (YYYY-MM-DD, opsional)")
+async def clear(interaction: discord.Interaction, date_str: str = ""):
+    user_id = interaction.user.id
+    today = datetime.now(WIB).date()
+
+    try:
+        target_date = datetime.strptime(date_str, "%Y-%m-%d").date() if date_str else today
+    except ValueError:
+        return await interaction.response.send_message("⚠️ Format tanggal tidak valid.", ephemeral=True)
+
+    await store.clear_todos(user_id, target_date)
+    await invalidate_todos(user_id, target_date)
+
+    await interaction.response.send_message(f"🧹 Semua tugas untuk {target_date} telah dihapus.")
+
+DATES_PAGE_SIZE = 15
+DATES_TASK_MAX_CHARS = 100  # 15 tugas x 100 karakter tetap di bawah batas 2000 karakter Discord
+
+def render_dates_page(rows, page_no):
+    lines = [f"📅 **Daftar Semua Tugas (WIB)** — halaman {page_no}"]
+    current_date = None
+    for r in rows:
+        if r["task_date"] != current_date:
+            current_date = r["task_date"]
+            lines.append(f"\n📆 {current_date.strftime('%Y-%m-%d')}:")
+        status = "✅" if r["done"] else "☐"
+        task = r["task"]
+        if len(task) > DATES_TASK_MAX_CHARS:
+            task = task[:DATES_TASK_MAX_CHARS - 3] + "..."
+        lines.append(f"　{status} {task}")
+    return "\n".join(lines)
+
+class DatesView(discord.ui.View):
+    """Halaman /dates; halaman berikut/sebelumnya baru di-query saat tombol ditekan."""
+
+    def __init__(self, user_id, rows, has_next):
+        super().__init__(timeout=180)
+        self.user_id = user_id
+        self.rows = rows
+        self.page_no = 1
+        self.has_prev = False
+        self.has_next = has_next
+        self.message = None
+        self.sync_buttons()
+
+    def sync_buttons(self):
+        self.prev_page.disabled = not self.has_prev
+        self.next_page.disabled = not self.has_next
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message("❌ Tombol ini hanya untuk pemilik daftar tugas.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="◀ Sebelumnya", style=discord.ButtonStyle.secondary)
+    async def prev_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        first = self.rows[0]
+        rows, more = await store.todos_page(self.user_id, DATES_PAGE_SIZE, before=(first["task_date"], first["id"]))
+        if rows:
+            self.rows, self.page_no = rows, max(self.page_no - 1, 1)
+            self.has_prev, self.has_next = more, True
+        else:
+            self.has_prev = False
+        await self.show(interaction)
+
+    @discord.ui.button(label="Berikutnya ▶", style=discord.ButtonStyle.primary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        last = self.rows[-1]
+        rows, more = await store.todos_page(self.user_id, DATES_PAGE_SIZE, after=(last["task_date"], last["id"]))
+        if rows:
+            self.rows, self.page_no = rows, self.page_no + 1
+            self.has_prev, self.has_next = True, more
+        else:
+            self.has_next = False  # tugas di halaman berikut sudah dihapus
+        await self.show(interaction)
+
+    async def show(self, interaction: discord.Interaction):
+        self.sync_buttons()
+        await interaction.response.edit_message(content=render_dates_page(self.rows, self.page_no), view=self)
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
+@bot.tree.command(name="dates", description="Lihat semua tugas kamu, dikelompokkan per tanggal.")
+async def dates(interaction: discord.Interaction):
+    user_id = interaction.user.id
+    # Hanya halaman pertama yang di-cache: itu yang dibuka setiap /dates
+    rows, has_next = await cached_read(todo_dates_key(user_id), user_id, lambda: store.todos_page(user_id, DATES_PAGE_SIZE))
+
+    if not rows:
+        return await interaction.response.send_message("✨ Kamu belum memiliki tugas sama sekali.")
+
+    if not has_next:
+        return await interaction.response.send_message(render_dates_page(rows, 1))
+
+    view = DatesView(user_id, rows, has_next)
+    await interaction.response.send_message(render_dates_page(rows, 1), view=view)
+    view.message = await interaction.original_response()
+
+# =====================================================
+# EXPORT (file dibangun di thread, bukan di event loop)
+# =====================================================
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", 2))
+EXPORT_CHUNK_ROWS = 500
+EXPORT_UPLOAD_LIMIT = int(float(os.getenv("EXPORT_UPLOAD_LIMIT_MB", 10)) * 1024 * 1024)
+EXPORT_FILES_PER_MESSAGE = 10  # batas lampiran Discord per pesan
+export_executor = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix="export")
+
+EXPORT_CACHE_MAX_BYTES = int(float(os.getenv("EXPORT_CACHE_MB", 64)) * 1024 * 1024)
+
+EXPORT_FORMATS = [
+    app_commands.Choice(name="Excel (.xlsx)", value="xlsx"),
+    app_commands.Choice(name="CSV (.csv)", value="csv"),
+    app_commands.Choice(name="CSV terkompresi (.csv.gz)", value="csv.gz"),
+]
+
+EXPORT_QUEUE_CHUNKS = 4  # chunk yang boleh menunggu builder; penuh = pembacaan cursor ditahan
+
+async def hand_off(chunks, chunk, job):
+    """put ke queue terbatas tanpa memblokir event loop. False jika builder sudah berhenti
+    (selesai atau gagal), supaya cursor tidak terus dikuras ke queue yang tidak dibaca."""
+    while not job.done():
+        try:
+            chunks.put_nowait(chunk)
+            return True
+        except queue.Full:
+            await asyncio.wait({job}, timeout=0.05)
+    return False
+
+async def run_export(build, records, *args):
+    """Baris dari cursor server-side diteruskan per chunk ke builder di export_executor,
+    jadi query dan pembuatan file berjalan bersamaan. Queue terbatas: kalau builder lebih lambat,
+    cursor ikut menunggu, jadi paling banyak EXPORT_QUEUE_CHUNKS chunk yang tertahan di memori.
+    Hasil: bytes file, atau None jika kosong."""
+    loop = asyncio.get_running_loop()
+    chunks = queue.Queue(maxsize=EXPORT_QUEUE_CHUNKS)
+    job = loop.run_in_executor(export_executor, build, drain(chunks), *args)
+    chunk = []
+    try:
+        async for r in records:
+            chunk.append(r)
+            if len(chunk) >= EXPORT_CHUNK_ROWS:
+                if not await hand_off(chunks, chunk, job):
+                    break
+                chunk = []
+        else:
+            if chunk:
+                await hand_off(chunks, chunk, job)
+    finally:
+        await records.aclose()  # lepas cursor/koneksi juga saat berhenti lebih awal
+        await hand_off(chunks, None, job)  # builder selalu berhenti, termasuk saat query gagal
+    return await job
+
+# (jenis, pemilik) -> penghitung perubahan; dinaikkan setiap penulisan to-do/absensi. Pemilik =
+# user_id ("todos", "attendance") atau guild_id ("guild_attendance", untuk laporan admin).
+# Cukup di memori: cache export juga di memori, jadi keduanya mulai dari nol bersama saat restart.
+DATA_VERSIONS = {}
+
+def data_version(kind, owner_id):
+    return DATA_VERSIONS.get((kind, owner_id), 0)
+
+def bump_data_version(kind, owner_id):
+    DATA_VERSIONS[(kind, owner_id)] = data_version(kind, owner_id) + 1
+
+def bump_attendance_version(user_id, guild_id):
+    bump_data_version("attendance", user_id)
+    bump_data_version("guild_attendance", guild_id)
+
+class ExportCache:
+    """LRU hasil export (list bytes per file), dibatasi total ukuran.
+
+    Kunci memuat versi data pemilik, jadi tidak perlu invalidasi: setelah data berubah
+    entri lama tidak pernah dicari lagi dan akhirnya tersingkir oleh LRU.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()  # key -> tuple bytes (kosong = tidak ada data)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        parts = self.entries.get(key)
+        if parts is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return parts
+
+    def set(self, key, parts):
+        size = sum(len(data) for data in parts)
+        if size > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= sum(len(data) for data in old)
+        self.entries[key] = parts
+        self.size += size
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= sum(len(data) for data in evicted)
+
+export_cache = ExportCache(EXPORT_CACHE_MAX_BYTES)
+EXPORT_INFLIGHT = {}  # key -> Task export yang sedang dibangun (permintaan identik menunggu yang sama)
+
+async def cached_export(key, build):
+    """Hasil build() untuk key, dari cache bila ada (tanpa query DB maupun openpyxl)."""
+    parts = export_cache.get(key)
+    if parts is None:
+        task = EXPORT_INFLIGHT.get(key)
+        if task is None:
+            async def run():
+                result = tuple(await build() or ())
+                export_cache.set(key, result)
+                return result
+
+            task = asyncio.ensure_future(run())
+            EXPORT_INFLIGHT[key] = task
+            task.add_done_callback(lambda _: EXPORT_INFLIGHT.pop(key, None))
+        parts = await asyncio.shield(task)
+    return list(parts) or None
+
+def upload_limit(interaction: discord.Interaction):
+    """Batas ukuran lampiran: batas server (naik dengan boost), maksimal EXPORT_UPLOAD_LIMIT_MB."""
+    if interaction.guild is not None:
+        return min(interaction.guild.filesize_limit, EXPORT_UPLOAD_LIMIT)
+    return EXPORT_UPLOAD_LIMIT
+
+async def build_export(fmt, records, limit, build_xlsx, build_csv, *xlsx_args):
+    """List bytes (satu per file), atau None jika tidak ada data. CSV langsung dipecah
+    menjadi part <= limit; .xlsx selalu satu file."""
+    if fmt == "xlsx":
+        data = await run_export(build_xlsx, records, *xlsx_args)
+        return None if data is None else [data]
+    return await run_export(build_csv, records, limit, fmt == "csv.gz")
+
+async def send_export(interaction: discord.Interaction, content, parts, basename, fmt, limit, csv_hint=True):
+    if len(parts) == 1:
+        if len(parts[0]) > limit:
+            size_mb = len(parts[0]) / 1024 / 1024
+            hint = "Gunakan `format: CSV terkompresi` atau persempit" if csv_hint else "Persempit"
+            return await interaction.followup.send(
+                f"⚠️ File terlalu besar untuk dikirim ({size_mb:.1f} MB). {hint} rentang tanggal."
+            )
+        files = [discord.File(BytesIO(parts[0]), filename=f"{basename}.{fmt}")]
+    else:
+        content += f" ({len(parts)} bagian)"
+        files = [
+            discord.File(BytesIO(data), filename=f"{basename}_part{i}of{len(parts)}.{fmt}")
+            for i, data in enumerate(parts, start=1)
+        ]
+
+    # Part digabung per pesan selama total ukurannya masih di bawah batas upload
+    batches, batch, batch_size = [], [], 0
+    for data, file in zip(parts, files):
+        if batch and (batch_size + len(data) > limit or len(batch) == EXPORT_FILES_PER_MESSAGE):
+            batches.append(batch)
+            batch, batch_size = [], 0
+        batch.append(file)
+        batch_size += len(data)
+    batches.append(batch)
+
+    for i, batch in enumerate(batches):
+        await interaction.followup.send(content if i == 0 else None, files=batch)
+
+@bot.tree.command(name="export_excel", description="Ekspor tugas kamu ke file Excel/CSV (bisa filter tanggal).")
+@app_commands.describe(
+    start_date="Tanggal mulai (YYYY-MM-DD, opsional)",
+    end_date="Tanggal akhir (YYYY-MM-DD, opsional)",
+    format="Format file (default Excel)"
+)
+@app_commands.choices(format=EXPORT_FORMATS)
+async def export_excel(interaction: discord.Interaction, start_date: str = "", end_date: str = "", format: str = "xlsx"):
+    user_id = interaction.user.id
+    user_name = interaction.user.name
+    await interaction.response.defer(thinking=True)
+
+    try:
+        start_dt = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
+        end_dt = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
+    except ValueError:
+        return await interaction.followup.send("⚠️ Format tanggal salah. Gunakan format `YYYY-MM-DD`.", ephemeral=True)
+
+    limit = upload_limit(interaction)
+    key = ("export_excel", user_id, start_dt, end_dt, format, limit, data_version("todos", user_id))
+    parts = await cached_export(key, lambda: build_export(
+        format, store.iter_todos(user_id, start_dt, end_dt), limit, build_todo_workbook, build_todo_csv
+    ))
+    if parts is None:
+        return await interaction.followup.send("📭 Tidak ada tugas dalam rentang tanggal tersebut.")
+
+    today_str = datetime.now(WIB).strftime("%Y-%m-%d")
+    label = "Excel" if format == "xlsx" else "CSV"
+    await send_export(interaction, f"📂 Berikut file {label} tugas kamu:", parts, f"todo_{user_name}_{today_str}", format, limit)
+
+# =====================================================
+# ATTENDANCE COMMANDS
+# =====================================================
+# (guild_id, user_id) -> {"id", "checkin_time", "work_date"} sesi yang belum checkout;
+# /checkout yang ketemu di sini langsung UPDATE tanpa SELECT
+OPEN_SESSIONS = {}
+
+async def load_open_sessions():
+    """Isi OPEN_SESSIONS dari DB saat startup (lewat index sesi terbuka, hanya hari ini)."""
+    work_date = datetime.now(WIB).date()
+    for row in await store.open_attendance(work_date):
+        OPEN_SESSIONS[(row["guild_id"], row["user_id"])] = {
+            "id": row["id"], "checkin_time": row["checkin_time"], "work_date": work_date
+        }
+    print(f"[ABSENSI] {len(OPEN_SESSIONS)} sesi terbuka dimuat.")
+
+# Rollup attendance_daily: diperbarui di /checkout, diperbaiki berkala dari tabel attendance mentah
+ROLLUP_RECONCILE_MINUTES = int(os.getenv("ROLLUP_RECONCILE_MINUTES", 60))
+ROLLUP_RECONCILE_DAYS = int(os.getenv("ROLLUP_RECONCILE_DAYS", 2))
+rollup_generation = 0  # naik tiap reconcile yang mengubah rollup; bagian dari key cache /laporan_absensi
+
+@tasks.loop(minutes=ROLLUP_RECONCILE_MINUTES)
+async def reconcile_attendance_rollup():
+    """Hitung ulang rollup beberapa hari terakhir (mis. data attendance yang diubah manual di DB)."""
+    global rollup_generation
+    since = datetime.now(WIB).date() - timedelta(days=ROLLUP_RECONCILE_DAYS)
+    started = time.perf_counter()
+    try:
+        changed = await store.reconcile_attendance_daily(since)
+    except Exception as e:
+        print(f"[ABSENSI] Reconcile attendance_daily gagal: {e}")
+        return
+    if changed:
+        rollup_generation += 1  # tanpa perubahan, export /laporan_absensi yang sudah di-cache tetap valid
+    print(f"[ABSENSI] Rollup sejak {since} direkonsiliasi, {changed} baris berubah "
+          f"({time.perf_counter() - started:.1f} s)")
+
+def get_open_session(guild_id, user_id, work_date):
+    session = OPEN_SESSIONS.get((guild_id, user_id))
+    if session and session["work_date"] != work_date:
+        # Sesi hari sebelumnya yang tidak pernah di-checkout; /checkout hanya untuk hari ini
+        del OPEN_SESSIONS[(guild_id, user_id)]
+        return None
+    return session
+
+@bot.tree.command(name="checkin", description="Catat absensi harian kamu (check-in).")
+async def checkin(interaction: discord.Interaction):
+    user_id = interaction.user.id
+    username = interaction.user.name
+    guild_id = interaction.guild_id
+    now_wib = datetime.now(WIB)
+    work_date = now_wib.date()
+
+    # Cek apakah user sudah check-in hari ini (sesi terbuka di memori, atau sudah checkout di DB)
+    if get_open_session(guild_id, user_id, work_date) or await store.find_attendance(user_id, guild_id, work_date):
+        return await interaction.response.send_message("⚠️ Kamu sudah check-in hari ini!")
+
+    attendance_id = await store.add_checkin(user_id, username, guild_id, now_wib, work_date)
+    OPEN_SESSIONS[(guild_id, user_id)] = {"id": attendance_id, "checkin_time": now_wib, "work_date": work_date}
+    bump_attendance_version(user_id, guild_id)
+
+    await interaction.response.send_message(
+        f"✅ {username}, kamu berhasil check-in pada **{now_wib.strftime('%Y-%m-%d %H:%M:%S')} WIB**!"
+    )
+
+@bot.tree.command(name="checkout", description="Catat waktu pulang kamu (checkout).")
+async def checkout(interaction: discord.Interaction):
+    user_id = interaction.user.id
+    guild_id = interaction.guild_id
+    now_wib = datetime.now(WIB)
+    work_date = now_wib.date()
+
+    record = get_open_session(guild_id, user_id, work_date)
+    if record is None:
+        # Tidak ada di memori: cek DB untuk membedakan "belum check-in" dan "sudah checkout"
+        record = await store.find_attendance(user_id, guild_id, work_date)
+
+        if not record:
+            return await interaction.response.send_message("⚠️ Kamu belum check-in hari ini.")
+
+        if record["checkout_time"]:
+            return await interaction.response.send_message("🕓 Kamu sudah checkout hari ini.")
+
+    work_duration = now_wib - record["checkin_time"]
+    OPEN_SESSIONS.pop((guild_id, user_id), None)
+    if not await store.set_checkout(record["id"], now_wib, work_duration):
+        return await interaction.response.send_message("🕓 Kamu sudah checkout hari ini.")
+    bump_attendance_version(user_id, guild_id)
+
+    hours, remainder = divmod(work_duration.total_seconds(), 3600)
+    minutes, _ = divmod(remainder, 60)
+
+    await interaction.response.send_message(
+        f"👋 Checkout berhasil pada **{now_wib.strftime('%Y-%m-%d %H:%M:%S')} WIB**!\n"
+        f"⏰ Durasi kerja hari ini: **{int(hours)} jam {int(minutes)} menit.**"
+    )
+
+@bot.tree.command(name="riwayat_absensi", description="Lihat riwayat absensi kamu (5 hari terakhir).")
+async def riwayat_absensi(interaction: discord.Interaction):
+    rows = await store.recent_attendance(interaction.user.id, 5)
+
+    if not rows:
+        await interaction.response.send_message("📭 Kamu belum punya riwayat absensi.")
+        return
+
+    msg = "**🗓️ Riwayat Absensi 5 Hari Terakhir:**\n"
+    for r in rows:
+        checkin = r["checkin_time"].strftime("%Y-%m-%d %H:%M:%S") if r["checkin_time"] else "-"
+        checkout = r["checkout_time"].strftime("%Y-%m-%d %H:%M:%S") if r["checkout_time"] else "-"
+        durasi = format_duration(r["work_duration"])
+
+        msg += f"📅 {checkin} → {checkout} | ⏱️ {durasi}\n"
+
+    await interaction.response.send_message(msg)
+    
+@app_commands.describe(
+    start_date="Tanggal mulai (format: YYYY-MM-DD, opsional)",
+    end_date="Tanggal akhir (format: YYYY-MM-DD, opsional)",
+    format="Format file (default Excel)"
+)
+@app_commands.choices(format=EXPORT_FORMATS)
+@bot.tree.command(name="export_absensi", description="Ekspor absensi kamu ke file Excel/CSV (bisa filter tanggal).")
+async def export_absensi(interaction: discord.Interaction, start_date: str = None, end_date: str = None, format: str = "xlsx"):
+    await interaction.response.defer(thinking=True)
+
+    user_id = interaction.user.id
+    username = interaction.user.name
+    guild_id = interaction.guild_id
+
+    # --- Parse tanggal (langsung sebagai WIB) ---
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=WIB) if start_date else None
+        end = (datetime.strptime(end_date, "%Y-%m-%d").replace(tzinfo=WIB) + timedelta(days=1)) if end_date else None
+    except ValueError:
+        await interaction.followup.send("⚠️ Format tanggal salah. Gunakan format: YYYY-MM-DD.")
+        return
+
+    # --- Buat file (dibaca bertahap dari cursor server-side, dibangun di thread export) ---
+    limit = upload_limit(interaction)
+    key = (
+        "export_absensi", user_id, guild_id, start, end, format, limit, username,
+        data_version("attendance", user_id),
+    )
+    parts = await cached_export(key, lambda: build_export(
+        format, store.iter_attendance(user_id, guild_id, start, end), limit,
+        build_attendance_workbook, build_attendance_csv, f"Absensi {username}",
+    ))
+    if parts is None:
+        await interaction.followup.send("📭 Tidak ada data absensi untuk periode tersebut.")
+        return
+
+    basename = f"absensi_{username}_{datetime.now(WIB).strftime('%Y%m%d_%H%M%S')}"
+    content = (
+        f"📊 Berikut hasil ekspor absensi kamu ({username})"
+        + (f" dari {start_date} sampai {end_date}" if start_date or end_date else "")
+        + ":"
+    )
+    await send_export(interaction, content, parts, basename, format, limit)
+
+LATE_CHECKIN_TIME = datetime.strptime(os.getenv("LATE_CHECKIN_TIME", "09:00"), "%H:%M").time()  # WIB
+
+@app_commands.describe(
+    start_date="Tanggal mulai (format: YYYY-MM-DD, opsional)",
+    end_date="Tanggal akhir (format: YYYY-MM-DD, opsional)"
+)
+@app_commands.default_permissions(manage_guild=True)
+@app_commands.guild_only()
+@bot.tree.command(name="laporan_absensi", description="Laporan absensi seluruh anggota server (admin).")
+async def laporan_absensi(interaction: discord.Interaction, start_date: str = None, end_date: str = None):
+    await interaction.response.defer(thinking=True)
+
+    guild_id = interaction.guild_id
+    guild_name = interaction.guild.name if interaction.guild else str(guild_id)
+
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
+        end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
+    except ValueError:
+        await interaction.followup.send("⚠️ Format tanggal salah. Gunakan format: YYYY-MM-DD.")
+        return
+
+    async def build():
+        # Rekap per anggota dari rollup attendance_daily (GROUP BY); hanya detail yang di-stream dari cursor
+        summary = await store.guild_attendance_summary(guild_id, start, end, LATE_CHECKIN_TIME)
+        if not summary:
+            return None
+        data = await run_export(
+            build_guild_attendance_workbook,
+            store.iter_guild_attendance(guild_id, start, end),
+            summary, LATE_CHECKIN_TIME,
+        )
+        return [data]
+
+    key = (
+        "laporan_absensi", guild_id, start, end, LATE_CHECKIN_TIME,
+        data_version("guild_attendance", guild_id), rollup_generation,
+    )
+    parts = await cached_export(key, build)
+    if parts is None:
+        await interaction.followup.send("📭 Tidak ada data absensi untuk periode tersebut.")
+        return
+
+    basename = f"laporan_absensi_{guild_id}_{datetime.now(WIB).strftime('%Y%m%d_%H%M%S')}"
+    content = (
+        f"📊 Laporan absensi **{guild_name}**"
+        + (f" dari {start_date or 'awal'} sampai {end_date or 'sekarang'}" if start_date or end_date else "")
+        + ":"
+    )
+    await send_export(interaction, content, parts, basename, "xlsx", upload_limit(interaction), csv_hint=False)
+
+# =====================================================
+# REMINDER ENGINE (min-heap + jendela muat dari DB)
+# =====================================================
+REMINDER_WINDOW_MINUTES = int(os.getenv("REMINDER_WINDOW_MINUTES", 10))
+REMINDER_REFILL_SECONDS = int(os.getenv("REMINDER_REFILL_SECONDS", 60))
+REMINDER_CLAIM_BATCH = int(os.getenv("REMINDER_CLAIM_BATCH", 50))
+REMINDER_WORKERS = int(os.getenv("REMINDER_WORKERS", 2))
+
+async def send_reminder(reminder):
+    channel = bot.get_channel(reminder["channel_id"])
+    if channel:
+        user_mention = f"<@{reminder['user_id']}>"
+        await channel.send(f"🔔 {user_mention} Reminder: {reminder['message']}")
+
+reminder_engine = ReminderEngine(
+    timedelta(minutes=REMINDER_WINDOW_MINUTES), REMINDER_REFILL_SECONDS, send_reminder,
+    REMINDER_CLAIM_BATCH, REMINDER_WORKERS
+)
+
+# =====================================================
+# REMINDER COMMANDS
+# =====================================================
+
+@bot.tree.command(name="reminder", description="Buat pengingat dengan waktu tertentu")
+@app_commands.describe(
+    message="Pesan yang akan dikirim",
+    tanggal="Tanggal (format: YYYY-MM-DD)",
+    jam="Jam (format: HH:MM, 24 jam)"
+)
+async def reminder(interaction: discord.Interaction, message: str, tanggal: str, jam: str):
+    try:
+        waktu = datetime.strptime(f"{tanggal} {jam}", "%Y-%m-%d %H:%M").replace(tzinfo=WIB)
+
+        if waktu <= datetime.now(WIB):
+            await interaction.response.send_message("❌ Waktu sudah lewat!", ephemeral=True)
+            return
+
+        reminder_id = await store.add_reminder(interaction.user.id, interaction.channel_id, message, waktu)
+
+        reminder_engine.add(reminder_id, waktu)
+        await interaction.response.send_message(f"✅ Reminder dibuat untuk {waktu.strftime('%Y-%m-%d %H:%M:%S')} WIB!")
+
+    except Exception as e:
+        await interaction.response.send_message(f"❌ Error: {e}", ephemeral=True)
+
+# =====================================================
+# RESTART COMMAND
+# =====================================================
+@bot.command()
+@commands.is_owner()
+async def restart(ctx):
+    await ctx.send("Bot akan restart...")
+    await bot.close()
+    ytdlp_executor.shutdown(wait=False, cancel_futures=True)
+    export_executor.shutdown(wait=False, cancel_futures=True)
+    os.execv(sys.executable, ['python'] + sys.argv)
+
+@bot.command()
+@commands.is_owner()
+async def musicstats(ctx):
+    gap_count = MUSIC_STATS["gap_count"]
+    avg_gap = MUSIC_STATS["gap_total_ms"] / gap_count if gap_count else 0.0
+    lines = [
+        f"🎚️ Jeda antar lagu: rata-rata **{avg_gap:.0f} ms**, terakhir **{MUSIC_STATS['gap_last_ms']:.0f} ms** "
+        f"({gap_count} transisi)",
+        f"⚡ Prefetch: {MUSIC_STATS['prefetch_hit']} hit / {MUSIC_STATS['prefetch_miss']} miss",
+        f"🎛️ Stream: {MUSIC_STATS['passthrough']} passthrough Opus / {MUSIC_STATS['transcoded']} transcode",
+        f"💾 Audio cache: {MUSIC_STATS['audio_cache_hit']} hit / {MUSIC_STATS['audio_cache_miss']} miss, "
+        f"{len(AUDIO_CACHE_INDEX)} file ({audio_cache_bytes / 1024 / 1024:.1f} MB)",
+        f"🔎 Search cache: {MUSIC_STATS['search_cache_hit']} hit / "
+        f"{MUSIC_STATS['search_cache_refresh']} refresh / {MUSIC_STATS['search_cache_miss']} miss",
+        f"📝 Buffer music_history: {len(HISTORY_BUFFER)} baris menunggu flush",
+    ]
+    for stage, (count, total) in PLAY_TIMINGS.items():
+        lines.append(f"⏱️ /play {stage}: rata-rata {total / count:.0f} ms ({count}x)")
+    await ctx.send("\n".join(lines))
+
+@bot.command()
+@commands.is_owner()
+async def cachestats(ctx):
+    lookups = todo_cache.hits + todo_cache.misses
+    hit_ratio = todo_cache.hits / lookups * 100 if lookups else 0.0
+    await ctx.send(
+        f"🗂️ Cache to-do: **{hit_ratio:.1f}%** hit ({todo_cache.hits} hit / {todo_cache.misses} miss), "
+        f"{todo_cache.invalidations} invalidasi, {len(todo_cache.entries)}/{todo_cache.max_entries} entri "
+        f"(TTL {todo_cache.ttl} s)\n"
+        f"📦 Cache export: {export_cache.hits} hit / {export_cache.misses} miss, "
+        f"{len(export_cache.entries)} entri, {export_cache.size / 1024 / 1024:.1f}/"
+        f"{export_cache.max_bytes / 1024 / 1024:.0f} MB"
+    )
+
+# =====================================================
+# BOT READY EVENT
+# =====================================================
+@bot.event
+async def on_ready():
+    print(f"✅ Logged in as {bot.user.name}")
+    try:
+        synced = await bot.tree.sync()
+        print(f"🪄 Synced {len(synced)} slash command(s).")
+    except Exception as e:
+        print(f"❌ Failed to sync commands: {e}")
+
+    # Refill pertama ikut memuat reminder yang terlewat saat bot mati, lalu langsung dikirim
+    reminder_engine.start(store)
+
+    if not evict_idle_players.is_running():
+        evict_idle_players.start()
+    if not queue_flush_loop.is_running():
+        queue_flush_loop.start()
+    if not reconcile_attendance_rollup.is_running():
+        reconcile_attendance_rollup.start()
+    start_history_writer()
+
+# =====================================================
+# RUN BOT
+# =====================================================
+def main(default_backend="postgres"):
+    """Entry point; mysql-version/ dan postgres-version/ hanya memanggil ini dengan backend default masing-masing."""
+    global store
+    backend = os.getenv("DB_BACKEND", default_backend)
+    store = create_storage(backend)
+    print(f"🗄️ Storage backend: {store.name}")
+    bot.run(TOKEN)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,272 @@
+"""Pembuat file export. Semua fungsi di sini sinkron dan CPU-bound: dijalankan di export_executor
+(thread terpisah), tidak pernah di event loop bot."""
+import csv
+import gzip
+import io
+import queue
+import zlib
+from io import BytesIO
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
+
+THIN = Side(border_style="thin", color="000000")
+BORDER = Border(left=THIN, right=THIN, top=THIN, bottom=THIN)
+HEADER_FONT = Font(bold=True)
+HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="center")
+
+# Lebar kolom tetap untuk sheet yang ditulis langsung dari cursor: lebar otomatis butuh semua baris
+# lebih dulu, karena workbook write-only menulis <cols> sebelum baris pertama
+TODO_HEADER = ["Tanggal", "Deskripsi Tugas", "Status", "Dibuat Pada"]
+TODO_WIDTHS = [12, 60, 12, 21]
+ATTENDANCE_HEADER = ["No", "Tanggal", "Check-in (WIB)", "Checkout (WIB)", "Durasi"]
+ATTENDANCE_WIDTHS = [7, 12, 16, 16, 10]
+GUILD_DETAIL_HEADER = ["Tanggal", "User ID", "Username", "Check-in (WIB)", "Checkout (WIB)", "Durasi"]
+GUILD_DETAIL_WIDTHS = [12, 21, 24, 16, 16, 10]
+
+
+def drain(chunks: queue.Queue):
+    """Baris dari event loop datang per chunk; None menandai cursor DB sudah habis."""
+    while True:
+        chunk = chunks.get()
+        if chunk is None:
+            return
+        yield from chunk
+
+
+class ColumnWidths:
+    """Lebar kolom dihitung sambil baris dibaca (bukan iterasi ulang ws.columns)."""
+
+    def __init__(self, header):
+        self.widths = [len(str(value)) for value in header]
+
+    def update(self, values):
+        for i, value in enumerate(values):
+            if value:
+                self.widths[i] = max(self.widths[i], len(str(value)))
+
+    def apply(self, ws):
+        # Workbook write-only menulis <cols> sebelum baris pertama, jadi harus di-set sebelum append
+        for i, width in enumerate(self.widths, start=1):
+            ws.column_dimensions[get_column_letter(i)].width = width + 2
+
+
+def apply_widths(ws, widths):
+    for i, width in enumerate(widths, start=1):
+        ws.column_dimensions[get_column_letter(i)].width = width
+
+
+def save_workbook(wb) -> bytes:
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def todo_rows(records):
+    """records: {task_date, task, done, created_at} -> tuple sesuai TODO_HEADER."""
+    for r in records:
+        tanggal = r["task_date"].strftime("%Y-%m-%d")
+        status = "✅ Selesai" if r["done"] else "☐ Belum"
+        dibuat = r["created_at"].strftime("%Y-%m-%d %H:%M:%S") if r["created_at"] else "-"
+        yield (tanggal, r["task"], status, dibuat)
+
+
+def attendance_rows(records):
+    """records: {checkin_time, checkout_time, work_duration} -> tuple sesuai ATTENDANCE_HEADER."""
+    for i, r in enumerate(records, start=1):
+        tanggal = r["checkin_time"].strftime("%Y-%m-%d") if r["checkin_time"] else "-"
+        checkin = r["checkin_time"].strftime("%H:%M:%S") if r["checkin_time"] else "-"
+        checkout = r["checkout_time"].strftime("%H:%M:%S") if r["checkout_time"] else "-"
+        yield (i, tanggal, checkin, checkout, format_duration(r["work_duration"]))
+
+
+def build_todo_workbook(records):
+    """Mengembalikan bytes .xlsx, atau None jika kosong. Baris ditulis langsung ke workbook
+    write-only saat dibaca; yang ditahan hanya posisi blok merge (satu per tanggal)."""
+    wb = ws = None
+    merges = []  # (baris_awal, baris_akhir) blok tanggal yang sama
+    block_start = None
+    current_date = None
+    row_idx = 1
+
+    def bordered(value):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.border = BORDER
+        return cell
+
+    for row_idx, values in enumerate(todo_rows(records), start=2):
+        if ws is None:
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet("Daftar Tugas")
+            apply_widths(ws, TODO_WIDTHS)
+            ws.append([bordered(value) for value in TODO_HEADER])
+        tanggal = values[0]
+        if tanggal != current_date:
+            if block_start is not None and row_idx - block_start > 1:
+                merges.append((block_start, row_idx - 1))
+            current_date, block_start = tanggal, row_idx
+        else:
+            values = (None,) + values[1:]  # sel tanggal di dalam blok merge dibiarkan kosong
+        ws.append([bordered(value) for value in values])
+
+    if ws is None:
+        return None
+    if row_idx - block_start >= 1:
+        merges.append((block_start, row_idx))
+    for start, end in merges:
+        ws.merged_cells.add(f"A{start}:A{end}")
+    return save_workbook(wb)
+
+
+def format_duration(work_duration):
+    return str(work_duration).split(".")[0] if work_duration else "-"
+
+
+def format_hours(duration):
+    """timedelta -> "J:MM:SS" dengan jam total (bisa lebih dari 24) untuk rekap jangka panjang."""
+    if duration is None:
+        return "-"
+    hours, remainder = divmod(int(duration.total_seconds()), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+def header_cells(ws, header):
+    cells = []
+    for value in header:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = HEADER_FONT
+        cell.alignment = HEADER_ALIGNMENT
+        cells.append(cell)
+    return cells
+
+
+def build_attendance_workbook(records, sheet_title):
+    """Mengembalikan bytes .xlsx, atau None jika kosong. Baris ditulis langsung saat dibaca."""
+    wb = ws = None
+    for values in attendance_rows(records):
+        if ws is None:
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet(sheet_title[:31])  # batas panjang nama sheet Excel
+            apply_widths(ws, ATTENDANCE_WIDTHS)
+            ws.append(header_cells(ws, ATTENDANCE_HEADER))
+        ws.append(values)
+    return save_workbook(wb) if ws is not None else None
+
+
+def build_guild_attendance_workbook(records, summary, late_after):
+    """Laporan absensi guild: sheet "Ringkasan" dari rekap GROUP BY (satu baris per anggota) dan
+    sheet "Detail" yang ditulis langsung dari records. Mengembalikan bytes .xlsx, atau None jika kosong."""
+    if not summary:
+        return None
+    wb = Workbook(write_only=True)
+
+    header = ["No", "User ID", "Username", "Hari Hadir", "Total Jam Kerja", "Rata-rata per Sesi",
+              f"Terlambat (> {late_after.strftime('%H:%M')})"]
+    widths = ColumnWidths(header)
+    rows = []
+    for i, r in enumerate(summary, start=1):
+        # User ID sebagai teks: angka 18 digit kehilangan presisi di Excel
+        values = (i, str(r["user_id"]), r["username"], r["days_present"],
+                  format_hours(r["total_duration"]), format_hours(r["avg_duration"]), r["late_count"])
+        widths.update(values)
+        rows.append(values)
+    ws = wb.create_sheet("Ringkasan")
+    widths.apply(ws)
+    ws.append(header_cells(ws, header))
+    for values in rows:
+        ws.append(values)
+
+    ws = wb.create_sheet("Detail")
+    apply_widths(ws, GUILD_DETAIL_WIDTHS)
+    ws.append(header_cells(ws, GUILD_DETAIL_HEADER))
+    for r in records:
+        ws.append((
+            r["work_date"].strftime("%Y-%m-%d"),
+            str(r["user_id"]),
+            r["username"],
+            r["checkin_time"].strftime("%H:%M:%S") if r["checkin_time"] else "-",
+            r["checkout_time"].strftime("%H:%M:%S") if r["checkout_time"] else "-",
+            format_duration(r["work_duration"]),
+        ))
+    return save_workbook(wb)
+
+
+class CsvParts:
+    """Menulis baris CSV langsung ke buffer upload, dipecah menjadi part yang masing-masing
+    <= limit byte. Setiap part berdiri sendiri (BOM + header, dan stream gzip sendiri)."""
+    FLUSH_BYTES = 64 * 1024  # gzip di-flush tiap segini supaya ukuran part selalu terukur
+    TRAILER_BYTES = 64       # cadangan untuk penutup stream gzip
+
+    def __init__(self, header, limit, compress):
+        self.limit = limit
+        self.compress = compress
+        self.parts = []
+        self.line = io.StringIO()
+        self.writer = csv.writer(self.line)
+        self.header = "\ufeff".encode("utf-8") + self.encode(header)  # BOM supaya Excel membaca UTF-8
+        self.buffer = None
+
+    def encode(self, values):
+        self.line.seek(0)
+        self.line.truncate()
+        self.writer.writerow(values)
+        return self.line.getvalue().encode("utf-8")
+
+    def open_part(self):
+        self.buffer = BytesIO()
+        self.stream = gzip.GzipFile(fileobj=self.buffer, mode="wb", mtime=0) if self.compress else self.buffer
+        self.unflushed = 0
+        self.rows = 0
+        self.write(self.header)
+
+    def close_part(self):
+        if self.compress:
+            self.stream.close()
+        self.parts.append(self.buffer.getvalue())
+
+    def write(self, data):
+        self.stream.write(data)
+        if self.compress:
+            self.unflushed += len(data)
+            if self.unflushed >= self.FLUSH_BYTES:
+                self.stream.flush(zlib.Z_SYNC_FLUSH)
+                self.unflushed = 0
+
+    def size_after(self, data):
+        # Data gzip yang belum di-flush dihitung sebesar ukuran mentahnya (batas atas)
+        pending = self.unflushed + self.TRAILER_BYTES if self.compress else 0
+        return self.buffer.tell() + pending + len(data)
+
+    def writerow(self, values):
+        data = self.encode(values)
+        if self.buffer is None:
+            self.open_part()
+        elif self.rows and self.size_after(data) > self.limit:
+            self.close_part()
+            self.open_part()
+        self.write(data)
+        self.rows += 1
+
+    def finish(self):
+        """Daftar bytes per part, kosong jika tidak ada baris."""
+        if self.buffer is not None:
+            self.close_part()
+            self.buffer = None
+        return self.parts
+
+
+def build_csv(rows, header, limit, compress):
+    parts = CsvParts(header, limit, compress)
+    for values in rows:
+        parts.writerow(values)
+    return parts.finish() or None
+
+
+def build_todo_csv(records, limit, compress=False):
+    return build_csv(todo_rows(records), TODO_HEADER, limit, compress)
+
+
+def build_attendance_csv(records, limit, compress=False):
+    return build_csv(attendance_rows(records), ATTENDANCE_HEADER, limit, compress)
@@ -0,0 +1,151 @@
+"""Dispatcher reminder. Tidak bergantung pada discord: pengiriman lewat callback `send`, jadi
+engine bisa dijalankan (dan dites) dengan store apa pun yang memenuhi kontrak Storage."""
+import asyncio
+import heapq
+import time
+from datetime import datetime
+from storage.base import WIB
+
+
+class ReminderEngine:
+    """Dispatcher reminder dengan min-heap (send_time, id).
+
+    Hanya reminder yang jatuh tempo sampai `loaded_until` (sekarang + jendela) yang ada di
+    memori; sisanya tetap di DB dan diambil lewat index send_time setiap refill. /reminder
+    yang waktunya masuk jendela langsung di-push ke heap.
+
+    Heap hanya penanda kapan harus bangun: pengiriman selalu lewat store.claim_due_reminders
+    yang atomik, jadi beberapa instance bot (atau worker di proses ini) tidak mengirim dobel.
+    Setiap refill juga memicu drain, supaya baris yang tidak lagi ada di heap mana pun (lease
+    MySQL yang kedaluwarsa, atau batch yang complete_reminders-nya gagal) tetap terkirim.
+    """
+
+    def __init__(self, window, refill_interval, send, claim_batch=50, workers=2):
+        self.window = window
+        self.refill_interval = refill_interval
+        self.send = send
+        self.claim_batch = claim_batch
+        self.workers = workers
+        self.store = None
+        self.heap = []              # (send_time, id)
+        self.queued = set()         # id di heap, supaya hasil refill tidak dobel
+        self.loaded_until = None    # semua reminder dengan send_time <= ini sudah ada di heap
+        self.wakeup = asyncio.Event()
+        self.task = None
+        self.drain_task = None
+        self.drain_again = False
+        self.stopping = False
+        self.sent = 0
+
+    def start(self, store):
+        self.store = store
+        self.stopping = False
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Hentikan loop, lalu tunggu drain yang sedang jalan: batch yang sudah diklaim tetap
+        dikirim dan di-complete, batch berikutnya tidak diklaim. Panggil sebelum store ditutup."""
+        self.stopping = True
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        if self.drain_task:
+            await self.drain_task
+
+    def push(self, reminder_id, send_time):
+        if reminder_id in self.queued:
+            return
+        heapq.heappush(self.heap, (send_time, reminder_id))
+        self.queued.add(reminder_id)
+        if self.heap[0][1] == reminder_id:
+            self.wakeup.set()  # jadi yang paling awal: hitung ulang waktu tidur
+
+    def add(self, reminder_id, send_time):
+        """Dipanggil setelah INSERT /reminder; di luar jendela nanti diambil refill."""
+        if self.loaded_until is not None and send_time <= self.loaded_until:
+            self.push(reminder_id, send_time)
+
+    async def refill(self):
+        previous = self.loaded_until
+        until = datetime.now(WIB) + self.window
+        # Dimajukan sebelum query: /reminder yang masuk selama query berjalan langsung di-push
+        self.loaded_until = until
+        try:
+            rows = await self.store.reminders_due(previous, until)
+        except Exception:
+            self.loaded_until = previous
+            raise
+        for r in rows:
+            self.push(r["id"], r["send_time"])
+        return len(rows)
+
+    def request_drain(self):
+        if self.drain_task is not None and not self.drain_task.done():
+            self.drain_again = True  # drain yang sedang jalan mengulang sekali lagi
+            return
+        self.drain_task = asyncio.create_task(self.drain())
+
+    async def drain(self):
+        while True:
+            self.drain_again = False
+            try:
+                await asyncio.gather(*(self.claim_worker() for _ in range(self.workers)))
+            except Exception as e:
+                print(f"[REMINDER] Gagal mengklaim reminder: {e}")
+            if not self.drain_again or self.stopping:
+                return
+
+    async def claim_worker(self):
+        """Klaim per batch sampai tidak ada lagi yang jatuh tempo (atau engine dihentikan)."""
+        while not self.stopping:
+            batch = await self.store.claim_due_reminders(datetime.now(WIB), self.claim_batch)
+            if not batch:
+                return
+            await asyncio.gather(*(self.deliver(r) for r in batch))
+            await self.store.complete_reminders([r["id"] for r in batch])
+            if len(batch) < self.claim_batch:
+                return
+
+    async def deliver(self, reminder):
+        try:
+            await self.send(reminder)
+            self.sent += 1
+        except Exception as e:
+            print(f"[REMINDER] Gagal mengirim reminder {reminder['id']}: {e}")
+
+    async def run(self):
+        next_refill = 0.0
+        first = True
+        while True:
+            if time.monotonic() >= next_refill:
+                try:
+                    loaded = await self.refill()
+                    if first:
+                        print(f"📅 Reminder engine aktif — {loaded} reminder dimuat "
+                              f"(jendela {self.window.total_seconds() / 60:.0f} menit).")
+                        first = False
+                except Exception as e:
+                    print(f"[REMINDER] Refill gagal: {e}")
+                # Lease kedaluwarsa sudah lewat dari jendela heap semua instance; hanya klaim yang melihatnya
+                self.request_drain()
+                next_refill = time.monotonic() + self.refill_interval
+
+            now = datetime.now(WIB)
+            if self.heap and self.heap[0][0] <= now:
+                while self.heap and self.heap[0][0] <= now:
+                    _, reminder_id = heapq.heappop(self.heap)
+                    self.queued.discard(reminder_id)
+                self.request_drain()
+
+            timeout = next_refill - time.monotonic()
+            if self.heap:
+                timeout = min(timeout, (self.heap[0][0] - now).total_seconds())
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), max(timeout, 0))
+            except asyncio.TimeoutError:
+                pass
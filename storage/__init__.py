@@ -0,0 +1,16 @@
+from .base import Storage, WIB
+
+
+def create_storage(backend: str) -> Storage:
+    """Pilih backend dari DB_BACKEND; driver di-import di sini supaya hanya driver yang dipakai yang wajib terpasang."""
+    backend = backend.lower()
+    if backend == "mysql":
+        from .mysql import MySQLStorage
+        return MySQLStorage()
+    if backend in ("postgres", "postgresql"):
+        from .postgres import PostgresStorage
+        return PostgresStorage()
+    if backend == "sqlite":
+        from .sqlite import SQLiteStorage
+        return SQLiteStorage()
+    raise ValueError(f"DB_BACKEND tidak dikenal: {backend} (pilih mysql, postgres, atau sqlite)")
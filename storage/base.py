@@ -0,0 +1,190 @@
+import time
+from contextlib import asynccontextmanager
+from zoneinfo import ZoneInfo
+
+WIB = ZoneInfo("Asia/Jakarta")
+
+
+class Migration:
+    """Satu langkah skema bernomor. transactional=False untuk DDL yang tidak boleh berjalan
+    di dalam transaksi (CREATE INDEX CONCURRENTLY di PostgreSQL)."""
+    __slots__ = ("version", "description", "statements", "transactional")
+
+    def __init__(self, version, description, statements, transactional=True):
+        self.version = version
+        self.description = description
+        self.statements = statements
+        self.transactional = transactional
+
+
+def keyset_page(rows, limit, backward):
+    """Baris diambil limit+1 untuk tahu apakah masih ada halaman; arah mundur dibalik lagi ke urutan naik."""
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if backward:
+        rows.reverse()
+    return rows, more
+
+
+class Storage:
+    """Interface penyimpanan yang dipakai bot.
+
+    Semua datetime yang masuk dan keluar adalah datetime aware (WIB); backend yang
+    menyimpan waktu tanpa zona (MySQL) mengonversinya sendiri. Baris dikembalikan
+    sebagai dict, dan method iter_* adalah async generator di atas cursor server-side
+    sehingga export besar tidak perlu dimuat sekaligus ke memori.
+    """
+
+    name = "base"
+    migrations = ()  # urut versi; migrasi yang sudah dirilis tidak boleh diubah, tambahkan versi baru
+
+    async def connect(self):
+        """Buka pool koneksi. Aman dipanggil berkali-kali (on_ready jalan lagi setelah reconnect)."""
+        raise NotImplementedError
+
+    async def close(self):
+        raise NotImplementedError
+
+    async def migrate(self):
+        """Jalankan migrasi yang belum tercatat di schema_version. Dipanggil sekali dari setup_hook."""
+        async with self.migration_lock():
+            current = await self.schema_version()
+            pending = [m for m in self.migrations if m.version > current]
+            for migration in pending:
+                print(f"[DB] Migrasi {migration.version}: {migration.description}...")
+                started = time.perf_counter()
+                await self.apply_migration(migration)
+                print(f"[DB] Migrasi {migration.version} selesai ({time.perf_counter() - started:.1f} s)")
+            if not pending:
+                print(f"[DB] Skema sudah versi {current}, tidak ada migrasi.")
+
+    @asynccontextmanager
+    async def migration_lock(self):
+        """Cegah dua instance bot memigrasi bersamaan; backend server menimpa ini."""
+        yield
+
+    async def schema_version(self) -> int:
+        """Buat tabel schema_version bila belum ada, lalu kembalikan versi tertinggi yang tercatat."""
+        raise NotImplementedError
+
+    async def apply_migration(self, migration):
+        """Jalankan statement migrasi lalu catat versinya di schema_version."""
+        raise NotImplementedError
+
+    # ---------- To-do ----------
+    async def add_todo(self, user_id, task_date, task, created_at):
+        raise NotImplementedError
+
+    async def list_todos(self, user_id, task_date):
+        """[{id, task, done}] untuk satu tanggal, urut id."""
+        raise NotImplementedError
+
+    async def set_todo_done(self, user_id, task_id):
+        """task_date tugas yang ditandai selesai (untuk invalidasi cache), None jika tidak ditemukan."""
+        raise NotImplementedError
+
+    async def delete_todo(self, user_id, task_id):
+        """task_date tugas yang dihapus, None jika tidak ditemukan."""
+        raise NotImplementedError
+
+    async def clear_todos(self, user_id, task_date) -> int:
+        raise NotImplementedError
+
+    async def todos_page(self, user_id, limit, after=None, before=None):
+        """Keyset pagination pada (task_date, id): ([{id, task_date, task, done}] urut naik, ada_lagi).
+
+        after/before = (task_date, id) baris terakhir/pertama halaman sekarang; ada_lagi berarti
+        masih ada baris ke arah yang diminta. Biaya query tetap, berapa pun panjang riwayatnya.
+        """
+        raise NotImplementedError
+
+    def iter_todos(self, user_id, start=None, end=None):
+        """Async iterator {task_date, task, done, created_at}; start/end (date) inklusif."""
+        raise NotImplementedError
+
+    # ---------- Musik ----------
+    async def load_cached_track(self, query_key):
+        """{video_id, title, url, expire} atau None."""
+        raise NotImplementedError
+
+    async def save_cached_track(self, query_key, track):
+        raise NotImplementedError
+
+    async def insert_music_history(self, rows):
+        """rows: list of (guild_id, user_id, title, url, action, created_at) — satu round-trip."""
+        raise NotImplementedError
+
+    async def recent_music_history(self, guild_id, limit):
+        """[{title, action, created_at}] terbaru lebih dulu."""
+        raise NotImplementedError
+
+    async def load_saved_queue(self, guild_id):
+        """queue_json tersimpan atau None."""
+        raise NotImplementedError
+
+    async def save_queue_snapshots(self, upserts, deletes):
+        """upserts: list of (guild_id, queue_json); deletes: list of guild_id."""
+        raise NotImplementedError
+
+    # ---------- Absensi ----------
+    async def add_checkin(self, user_id, username, guild_id, checkin_time, work_date) -> int:
+        """Simpan check-in; work_date = tanggal WIB dari checkin_time. Mengembalikan id baris."""
+        raise NotImplementedError
+
+    async def find_attendance(self, user_id, guild_id, work_date):
+        """Check-in terakhir pada work_date: {id, checkin_time, checkout_time} atau None."""
+        raise NotImplementedError
+
+    async def open_attendance(self, work_date):
+        """[{id, user_id, guild_id, checkin_time}] sesi pada work_date yang belum checkout."""
+        raise NotImplementedError
+
+    async def set_checkout(self, attendance_id, checkout_time, work_duration) -> bool:
+        """Checkout sesi sekaligus menambahkannya ke rollup attendance_daily (upsert per guild, user,
+        work_date) dalam satu transaksi. False jika sesi sudah di-checkout sebelumnya."""
+        raise NotImplementedError
+
+    async def recent_attendance(self, user_id, limit):
+        """[{checkin_time, checkout_time, work_duration}] terbaru lebih dulu."""
+        raise NotImplementedError
+
+    def iter_attendance(self, user_id, guild_id, start=None, end=None):
+        """Async iterator {checkin_time, checkout_time, work_duration}, terbaru lebih dulu; end eksklusif."""
+        raise NotImplementedError
+
+    async def reconcile_attendance_daily(self, since) -> int:
+        """Hitung ulang rollup dari tabel attendance untuk work_date >= since (date), sekaligus menghapus
+        baris rollup yang sesinya sudah tidak ada (dihapus, atau checkout dikosongkan). Mengembalikan
+        jumlah baris rollup yang berubah (> 0 berarti ada yang berubah; MySQL menghitung update dua kali)."""
+        raise NotImplementedError
+
+    async def guild_attendance_summary(self, guild_id, start, end, late_after):
+        """Rekap per user dari rollup attendance_daily, start/end (date) inklusif pada work_date:
+        [{user_id, username, days_present, total_duration, avg_duration, late_count}] urut username.
+        Hanya sesi yang sudah checkout; avg_duration per sesi; late_count = jumlah hari dengan
+        check-in pertama setelah jam late_after (datetime.time, WIB)."""
+        raise NotImplementedError
+
+    def iter_guild_attendance(self, guild_id, start, end):
+        """Async iterator {work_date, user_id, username, checkin_time, checkout_time, work_duration}
+        seluruh anggota guild, urut tanggal lalu jam check-in."""
+        raise NotImplementedError
+
+    # ---------- Reminder ----------
+    async def add_reminder(self, user_id, channel_id, message, send_time) -> int:
+        raise NotImplementedError
+
+    async def claim_due_reminders(self, now, limit):
+        """Klaim atomik maksimal `limit` reminder dengan send_time <= now:
+        [{id, user_id, channel_id, message, send_time}] urut send_time. Reminder yang sudah
+        diklaim (oleh proses ini atau instance lain) tidak pernah dikembalikan dua kali."""
+        raise NotImplementedError
+
+    async def complete_reminders(self, reminder_ids):
+        """Tandai klaim selesai setelah dikirim. No-op untuk backend yang menghapus saat klaim."""
+        raise NotImplementedError
+
+    async def reminders_due(self, after, until):
+        """[{id, send_time}] dengan after < send_time <= until, urut send_time (lewat index send_time).
+        after=None berarti tanpa batas bawah, termasuk reminder yang terlewat saat bot mati."""
+        raise NotImplementedError
@@ -0,0 +1,655 @@
+import os
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+import aiomysql
+from .base import Migration, Storage, WIB, keyset_page
+
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_PORT = int(os.getenv("DB_PORT", 3306))
+DB_USER = os.getenv("DB_USER", "root")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "")
+DB_NAME = os.getenv("DB_NAME", "discord_bot")
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 2))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 10))
+EXPORT_FETCH_SIZE = 500
+REMINDER_LEASE_SECONDS = int(os.getenv("REMINDER_LEASE_SECONDS", 300))
+
+
+def to_db(value):
+    """Kolom DATETIME/TIMESTAMP MySQL menyimpan jam dinding WIB tanpa zona."""
+    return value.astimezone(WIB).replace(tzinfo=None) if value else None
+
+
+def from_db(value):
+    return value.replace(tzinfo=WIB) if value else None
+
+
+class IfMissing:
+    """DDL yang dilewati bila kolom/index-nya sudah ada. DDL MySQL auto-commit per statement,
+    jadi migrasi yang terputus di tengah (bot dimatikan saat backfill) harus bisa diulang dari awal."""
+    __slots__ = ("kind", "table", "name", "statement")
+
+    CHECKS = {
+        "column": """SELECT COUNT(*) FROM information_schema.COLUMNS
+                     WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s""",
+        "index": """SELECT COUNT(*) FROM information_schema.STATISTICS
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s""",
+    }
+
+    def __init__(self, kind, table, name, statement):
+        self.kind = kind
+        self.table = table
+        self.name = name
+        self.statement = statement
+
+
+MIGRATIONS = (
+    Migration(1, "skema awal", [
+        """
+        CREATE TABLE IF NOT EXISTS todos (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id BIGINT NOT NULL,
+            task_date DATE NOT NULL,
+            task TEXT NOT NULL,
+            done BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_user_date (user_id, task_date)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS music_history (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            title TEXT NOT NULL,
+            url TEXT,
+            action VARCHAR(50),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_guild (guild_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS attendance (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id BIGINT NOT NULL,
+            username VARCHAR(255) NOT NULL,
+            guild_id BIGINT NOT NULL,
+            checkin_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            checkout_time TIMESTAMP NULL,
+            work_duration TIME NULL,
+            INDEX idx_user_guild (user_id, guild_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS reminders (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id BIGINT NOT NULL,
+            channel_id BIGINT NOT NULL,
+            message TEXT NOT NULL,
+            send_time TIMESTAMP NOT NULL,
+            INDEX idx_send_time (send_time)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS ytdlp_cache (
+            query_key VARCHAR(255) PRIMARY KEY,
+            video_id VARCHAR(32),
+            title TEXT NOT NULL,
+            audio_url TEXT NOT NULL,
+            expire BIGINT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS music_queues (
+            guild_id BIGINT PRIMARY KEY,
+            queue_json MEDIUMTEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+        """,
+    ]),
+    # DDL online InnoDB: tabel tetap bisa dibaca/ditulis selama index dibangun
+    # Satu ALTER atomik per tabel: index baru sudah ada = ALTER itu sudah selesai
+    Migration(2, "index komposit music_history & attendance", [
+        IfMissing("index", "music_history", "idx_guild_created", """
+        ALTER TABLE music_history
+            ADD INDEX idx_guild_created (guild_id, created_at),
+            DROP INDEX idx_guild,
+            ALGORITHM=INPLACE, LOCK=NONE
+        """),
+        IfMissing("index", "attendance", "idx_user_guild_checkin", """
+        ALTER TABLE attendance
+            ADD INDEX idx_user_guild_checkin (user_id, guild_id, checkin_time),
+            DROP INDEX idx_user_guild,
+            ALGORITHM=INPLACE, LOCK=NONE
+        """),
+    ]),
+    # work_date = tanggal WIB check-in; kolom waktu MySQL sudah jam dinding WIB jadi cukup DATE()
+    Migration(3, "attendance.work_date & index sesi terbuka", [
+        IfMissing("column", "attendance", "work_date", "ALTER TABLE attendance ADD COLUMN work_date DATE NULL"),
+        "UPDATE attendance SET work_date = DATE(checkin_time) WHERE work_date IS NULL",
+        IfMissing("index", "attendance", "idx_user_guild_workdate", """
+        ALTER TABLE attendance
+            ADD INDEX idx_user_guild_workdate (user_id, guild_id, work_date),
+            ADD INDEX idx_open_session (work_date, checkout_time),
+            ALGORITHM=INPLACE, LOCK=NONE
+        """),
+    ]),
+    # Laporan guild: GROUP BY user_id per guild & rentang work_date langsung dari index
+    Migration(4, "index laporan absensi guild", [
+        IfMissing("index", "attendance", "idx_guild_workdate", """
+        ALTER TABLE attendance
+            ADD INDEX idx_guild_workdate (guild_id, work_date, user_id),
+            ALGORITHM=INPLACE, LOCK=NONE
+        """),
+    ]),
+    # Rollup harian: laporan membaca satu baris per (guild, user, hari), bukan sesi mentah.
+    # DATETIME (bukan TIMESTAMP) supaya tidak kena ON UPDATE CURRENT_TIMESTAMP implisit.
+    Migration(5, "rollup attendance_daily", [
+        """
+        CREATE TABLE IF NOT EXISTS attendance_daily (
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            work_date DATE NOT NULL,
+            username VARCHAR(255) NOT NULL,
+            first_checkin DATETIME NOT NULL,
+            last_checkout DATETIME NOT NULL,
+            total_seconds INT NOT NULL DEFAULT 0,
+            sessions INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, work_date, user_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+        """,
+        """
+        INSERT IGNORE INTO attendance_daily
+            (guild_id, user_id, work_date, username, first_checkin, last_checkout, total_seconds, sessions)
+        SELECT guild_id, user_id, work_date, MAX(username), MIN(checkin_time), MAX(checkout_time),
+               COALESCE(SUM(TIME_TO_SEC(work_duration)), 0), COUNT(*)
+        FROM attendance
+        WHERE checkout_time IS NOT NULL
+        GROUP BY guild_id, user_id, work_date
+        """,
+    ]),
+    # Klaim reminder: baris dipinjam (lease) oleh satu instance sampai dikirim lalu dihapus;
+    # lease yang kedaluwarsa (proses mati di tengah kirim) boleh diklaim ulang.
+    Migration(6, "lease klaim reminders", [
+        IfMissing("column", "reminders", "claimed_by", """
+        ALTER TABLE reminders
+            ADD COLUMN claimed_by VARCHAR(64) NULL,
+            ADD COLUMN claimed_until DATETIME NULL,
+            ALGORITHM=INPLACE, LOCK=NONE
+        """),
+    ]),
+    # Key cache memuat video ID YouTube yang peka huruf besar-kecil; collation default _ci menyamakannya.
+    # MODIFY ke kolom yang sama aman diulang.
+    Migration(7, "ytdlp_cache.query_key case-sensitive", [
+        """
+        ALTER TABLE ytdlp_cache
+            MODIFY query_key VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL
+        """,
+    ]),
+)
+
+
+class MySQLStorage(Storage):
+    name = "mysql"
+    migrations = MIGRATIONS
+
+    def __init__(self):
+        self.pool = None
+        self.instance_id = uuid.uuid4().hex  # pemilik lease reminder
+
+    async def connect(self):
+        if self.pool is not None:
+            return
+        self.pool = await aiomysql.create_pool(
+            host=DB_HOST,
+            port=DB_PORT,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            db=DB_NAME,
+            minsize=DB_POOL_MIN,
+            maxsize=DB_POOL_MAX,
+            autocommit=True,
+            charset='utf8mb4'
+        )
+
+    async def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+            self.pool = None
+
+    async def execute(self, query, params=()):
+        """Jalankan satu statement; hasilnya (rowcount, lastrowid)."""
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, params)
+                return cursor.rowcount, cursor.lastrowid
+
+    async def fetchall(self, query, params=()):
+        async with self.pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(query, params)
+                return list(await cursor.fetchall())
+
+    async def fetchone(self, query, params=()):
+        async with self.pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(query, params)
+                return await cursor.fetchone()
+
+    async def stream(self, query, params=()):
+        """SSDictCursor: baris dibaca dari server per batch, bukan di-buffer semua di client."""
+        async with self.pool.acquire() as conn:
+            async with conn.cursor(aiomysql.SSDictCursor) as cursor:
+                await cursor.execute(query, params)
+                while True:
+                    rows = await cursor.fetchmany(EXPORT_FETCH_SIZE)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield row
+
+    @asynccontextmanager
+    async def migration_lock(self):
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute("SELECT GET_LOCK('todomusicbot_migrate', 600)")
+                try:
+                    yield
+                finally:
+                    await cursor.execute("SELECT RELEASE_LOCK('todomusicbot_migrate')")
+
+    async def schema_version(self):
+        await self.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INT PRIMARY KEY,
+                description VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+        """)
+        row = await self.fetchone("SELECT COALESCE(MAX(version), 0) AS version FROM schema_version")
+        return row["version"]
+
+    async def apply_migration(self, migration):
+        # DDL MySQL auto-commit per statement, jadi dijalankan berurutan tanpa transaksi;
+        # langkah IfMissing yang sudah diterapkan (run sebelumnya terputus) dilewati
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                for statement in migration.statements:
+                    if isinstance(statement, IfMissing):
+                        await cursor.execute(IfMissing.CHECKS[statement.kind], (statement.table, statement.name))
+                        (exists,) = await cursor.fetchone()
+                        if exists:
+                            print(f"[DB] {statement.kind} {statement.table}.{statement.name} sudah ada, dilewati.")
+                            continue
+                        statement = statement.statement
+                    await cursor.execute(statement)
+                await cursor.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                    (migration.version, migration.description)
+                )
+
+    # ---------- To-do ----------
+    async def add_todo(self, user_id, task_date, task, created_at):
+        await self.execute(
+            "INSERT INTO todos (user_id, task_date, task, done, created_at) VALUES (%s, %s, %s, FALSE, %s)",
+            (user_id, task_date, task, to_db(created_at))
+        )
+
+    async def list_todos(self, user_id, task_date):
+        return await self.fetchall(
+            "SELECT id, task, done FROM todos WHERE user_id=%s AND task_date=%s ORDER BY id",
+            (user_id, task_date)
+        )
+
+    async def set_todo_done(self, user_id, task_id):
+        # MySQL tidak punya RETURNING; SELECT dulu juga membuat /done ulang tidak dianggap "tidak ditemukan"
+        row = await self.fetchone("SELECT task_date FROM todos WHERE id=%s AND user_id=%s", (task_id, user_id))
+        if not row:
+            return None
+        await self.execute("UPDATE todos SET done=TRUE WHERE id=%s AND user_id=%s", (task_id, user_id))
+        return row["task_date"]
+
+    async def delete_todo(self, user_id, task_id):
+        row = await self.fetchone("SELECT task_date FROM todos WHERE id=%s AND user_id=%s", (task_id, user_id))
+        if not row:
+            return None
+        await self.execute("DELETE FROM todos WHERE id=%s AND user_id=%s", (task_id, user_id))
+        return row["task_date"]
+
+    async def clear_todos(self, user_id, task_date):
+        affected, _ = await self.execute("DELETE FROM todos WHERE user_id=%s AND task_date=%s", (user_id, task_date))
+        return affected
+
+    async def todos_page(self, user_id, limit, after=None, before=None):
+        # Index idx_user_date (user_id, task_date) + PK id implisit di InnoDB sudah urut (task_date, id)
+        query = "SELECT id, task_date, task, done FROM todos WHERE user_id=%s"
+        params = [user_id]
+        cursor_key = after or before
+        if cursor_key:
+            op = ">" if after else "<"
+            query += f" AND (task_date {op} %s OR (task_date = %s AND id {op} %s))"
+            params += [cursor_key[0], cursor_key[0], cursor_key[1]]
+        order = "DESC" if before else "ASC"
+        query += f" ORDER BY task_date {order}, id {order} LIMIT %s"
+        params.append(limit + 1)
+        return keyset_page(await self.fetchall(query, params), limit, bool(before))
+
+    async def iter_todos(self, user_id, start=None, end=None):
+        query = "SELECT task_date, task, done, created_at FROM todos WHERE user_id=%s"
+        params = [user_id]
+        if start:
+            query += " AND task_date >= %s"
+            params.append(start)
+        if end:
+            query += " AND task_date <= %s"
+            params.append(end)
+        query += " ORDER BY task_date ASC, id ASC"
+        async for row in self.stream(query, params):
+            row["created_at"] = from_db(row["created_at"])
+            yield row
+
+    # ---------- Musik ----------
+    async def load_cached_track(self, query_key):
+        row = await self.fetchone(
+            "SELECT video_id, title, audio_url AS url, expire FROM ytdlp_cache WHERE query_key=%s",
+            (query_key,)
+        )
+        return dict(row) if row else None
+
+    async def save_cached_track(self, query_key, track):
+        await self.execute(
+            """INSERT INTO ytdlp_cache (query_key, video_id, title, audio_url, expire)
+               VALUES (%s, %s, %s, %s, %s)
+               ON DUPLICATE KEY UPDATE video_id=VALUES(video_id), title=VALUES(title),
+                   audio_url=VALUES(audio_url), expire=VALUES(expire)""",
+            (query_key, track["video_id"], track["title"], track["url"], track["expire"])
+        )
+
+    async def insert_music_history(self, rows):
+        # executemany untuk INSERT ... VALUES digabung aiomysql menjadi satu INSERT multi-row
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.executemany(
+                    """INSERT INTO music_history (guild_id, user_id, title, url, action, created_at)
+                       VALUES (%s, %s, %s, %s, %s, %s)""",
+                    [(*row[:5], to_db(row[5])) for row in rows]
+                )
+
+    async def recent_music_history(self, guild_id, limit):
+        rows = await self.fetchall(
+            """
+            SELECT title, action, created_at
+            FROM music_history
+            WHERE guild_id = %s
+            ORDER BY created_at DESC
+            LIMIT %s
+            """,
+            (guild_id, limit)
+        )
+        for row in rows:
+            row["created_at"] = from_db(row["created_at"])
+        return rows
+
+    async def load_saved_queue(self, guild_id):
+        row = await self.fetchone("SELECT queue_json FROM music_queues WHERE guild_id=%s", (guild_id,))
+        return row["queue_json"] if row else None
+
+    async def save_queue_snapshots(self, upserts, deletes):
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                if upserts:
+                    await cursor.executemany(
+                        """INSERT INTO music_queues (guild_id, queue_json) VALUES (%s, %s)
+                           ON DUPLICATE KEY UPDATE queue_json=VALUES(queue_json)""",
+                        upserts
+                    )
+                if deletes:
+                    placeholders = ", ".join(["%s"] * len(deletes))
+                    await cursor.execute(f"DELETE FROM music_queues WHERE guild_id IN ({placeholders})", deletes)
+
+    # ---------- Absensi ----------
+    async def add_checkin(self, user_id, username, guild_id, checkin_time, work_date):
+        _, attendance_id = await self.execute(
+            """INSERT INTO attendance (user_id, username, guild_id, checkin_time, work_date)
+               VALUES (%s, %s, %s, %s, %s)""",
+            (user_id, username, guild_id, to_db(checkin_time), work_date)
+        )
+        return attendance_id
+
+    async def find_attendance(self, user_id, guild_id, work_date):
+        row = await self.fetchone("""
+            SELECT id, checkin_time, checkout_time
+            FROM attendance
+            WHERE user_id = %s AND guild_id = %s AND work_date = %s
+            ORDER BY checkin_time DESC LIMIT 1
+        """, (user_id, guild_id, work_date))
+        if row:
+            row["checkin_time"] = from_db(row["checkin_time"])
+            row["checkout_time"] = from_db(row["checkout_time"])
+        return row
+
+    async def open_attendance(self, work_date):
+        rows = await self.fetchall("""
+            SELECT id, user_id, guild_id, checkin_time
+            FROM attendance
+            WHERE work_date = %s AND checkout_time IS NULL
+        """, (work_date,))
+        for row in rows:
+            row["checkin_time"] = from_db(row["checkin_time"])
+        return rows
+
+    async def set_checkout(self, attendance_id, checkout_time, work_duration):
+        # Checkout dan rollup satu transaksi: reconcile tidak pernah melihat yang satu tanpa yang lain
+        async with self.pool.acquire() as conn:
+            await conn.begin()
+            try:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(
+                        """UPDATE attendance SET checkout_time = %s, work_duration = %s
+                           WHERE id = %s AND checkout_time IS NULL""",
+                        (to_db(checkout_time), work_duration, attendance_id)
+                    )
+                    affected = cursor.rowcount
+                    if affected:
+                        await cursor.execute("""
+                            INSERT INTO attendance_daily
+                                (guild_id, user_id, work_date, username, first_checkin, last_checkout,
+                                 total_seconds, sessions)
+                            SELECT guild_id, user_id, work_date, username, checkin_time, checkout_time,
+                                   TIME_TO_SEC(work_duration), 1
+                            FROM attendance
+                            WHERE id = %s
+                            ON DUPLICATE KEY UPDATE
+                                username = VALUES(username),
+                                first_checkin = LEAST(first_checkin, VALUES(first_checkin)),
+                                last_checkout = GREATEST(last_checkout, VALUES(last_checkout)),
+                                total_seconds = total_seconds + VALUES(total_seconds),
+                                sessions = sessions + 1
+                        """, (attendance_id,))
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+        return affected > 0
+
+    async def recent_attendance(self, user_id, limit):
+        rows = await self.fetchall("""
+            SELECT checkin_time, checkout_time, work_duration
+            FROM attendance
+            WHERE user_id = %s
+            ORDER BY checkin_time DESC
+            LIMIT %s
+        """, (user_id, limit))
+        for row in rows:
+            row["checkin_time"] = from_db(row["checkin_time"])
+            row["checkout_time"] = from_db(row["checkout_time"])
+        return rows
+
+    async def iter_attendance(self, user_id, guild_id, start=None, end=None):
+        query = """
+            SELECT checkin_time, checkout_time, work_duration
+            FROM attendance
+            WHERE user_id = %s AND guild_id = %s
+        """
+        params = [user_id, guild_id]
+        if start:
+            query += " AND checkin_time >= %s"
+            params.append(to_db(start))
+        if end:
+            query += " AND checkin_time < %s"
+            params.append(to_db(end))
+        query += " ORDER BY checkin_time DESC"
+        async for row in self.stream(query, params):
+            row["checkin_time"] = from_db(row["checkin_time"])
+            row["checkout_time"] = from_db(row["checkout_time"])
+            yield row
+
+    @staticmethod
+    def guild_range(guild_id, start, end):
+        where = "WHERE guild_id = %s"
+        params = [guild_id]
+        if start:
+            where += " AND work_date >= %s"
+            params.append(start)
+        if end:
+            where += " AND work_date <= %s"
+            params.append(end)
+        return where, params
+
+    async def reconcile_attendance_daily(self, since):
+        # rowcount ON DUPLICATE KEY: 1 per insert, 2 per update, 0 jika nilainya sama (tanpa CLIENT_FOUND_ROWS)
+        async with self.pool.acquire() as conn:
+            await conn.begin()
+            try:
+                async with conn.cursor() as cursor:
+                    await cursor.execute("""
+                        DELETE FROM attendance_daily
+                        WHERE work_date >= %s AND NOT EXISTS (
+                            SELECT 1 FROM attendance a
+                            WHERE a.guild_id = attendance_daily.guild_id
+                              AND a.user_id = attendance_daily.user_id
+                              AND a.work_date = attendance_daily.work_date
+                              AND a.checkout_time IS NOT NULL
+                        )
+                    """, (since,))
+                    affected = cursor.rowcount
+                    await cursor.execute("""
+                        INSERT INTO attendance_daily
+                            (guild_id, user_id, work_date, username, first_checkin, last_checkout,
+                             total_seconds, sessions)
+                        SELECT guild_id, user_id, work_date, MAX(username), MIN(checkin_time), MAX(checkout_time),
+                               COALESCE(SUM(TIME_TO_SEC(work_duration)), 0), COUNT(*)
+                        FROM attendance
+                        WHERE work_date >= %s AND checkout_time IS NOT NULL
+                        GROUP BY guild_id, user_id, work_date
+                        ON DUPLICATE KEY UPDATE
+                            username = VALUES(username),
+                            first_checkin = VALUES(first_checkin),
+                            last_checkout = VALUES(last_checkout),
+                            total_seconds = VALUES(total_seconds),
+                            sessions = VALUES(sessions)
+                    """, (since,))
+                    affected += cursor.rowcount
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+        return affected
+
+    async def guild_attendance_summary(self, guild_id, start, end, late_after):
+        where, params = self.guild_range(guild_id, start, end)
+        rows = await self.fetchall(f"""
+            SELECT user_id,
+                   MAX(username) AS username,
+                   COUNT(*) AS days_present,
+                   SUM(total_seconds) AS total_seconds,
+                   SUM(total_seconds) / SUM(sessions) AS avg_seconds,
+                   SUM(TIME(first_checkin) > %s) AS late_count
+            FROM attendance_daily
+            {where}
+            GROUP BY user_id
+            ORDER BY username
+        """, [late_after.strftime("%H:%M:%S")] + params)
+        for row in rows:
+            # SUM dan pembagian menghasilkan DECIMAL
+            total, avg = row.pop("total_seconds"), row.pop("avg_seconds")
+            row["total_duration"] = timedelta(seconds=float(total or 0))
+            row["avg_duration"] = timedelta(seconds=float(avg)) if avg is not None else None
+            row["late_count"] = int(row["late_count"] or 0)
+        return rows
+
+    async def iter_guild_attendance(self, guild_id, start, end):
+        where, params = self.guild_range(guild_id, start, end)
+        query = f"""
+            SELECT work_date, user_id, username, checkin_time, checkout_time, work_duration
+            FROM attendance
+            {where}
+            ORDER BY work_date, checkin_time
+        """
+        async for row in self.stream(query, params):
+            row["checkin_time"] = from_db(row["checkin_time"])
+            row["checkout_time"] = from_db(row["checkout_time"])
+            yield row
+
+    # ---------- Reminder ----------
+    async def add_reminder(self, user_id, channel_id, message, send_time):
+        _, reminder_id = await self.execute(
+            "INSERT INTO reminders (user_id, channel_id, message, send_time) VALUES (%s, %s, %s, %s)",
+            (user_id, channel_id, message, to_db(send_time))
+        )
+        return reminder_id
+
+    async def claim_due_reminders(self, now, limit):
+        # MySQL tidak punya DELETE ... RETURNING: kunci baris dengan FOR UPDATE SKIP LOCKED (8.0+)
+        # lalu pasang lease di transaksi yang sama; dihapus oleh complete_reminders setelah terkirim.
+        now_db = to_db(now)
+        lease_until = to_db(datetime.now(WIB) + timedelta(seconds=REMINDER_LEASE_SECONDS))
+        async with self.pool.acquire() as conn:
+            await conn.begin()
+            try:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    await cursor.execute("""
+                        SELECT id, user_id, channel_id, message, send_time
+                        FROM reminders
+                        WHERE send_time <= %s AND (claimed_until IS NULL OR claimed_until < %s)
+                        ORDER BY send_time
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    """, (now_db, now_db, limit))
+                    rows = list(await cursor.fetchall())
+                    if rows:
+                        placeholders = ", ".join(["%s"] * len(rows))
+                        await cursor.execute(
+                            f"UPDATE reminders SET claimed_by = %s, claimed_until = %s WHERE id IN ({placeholders})",
+                            [self.instance_id, lease_until] + [row["id"] for row in rows]
+                        )
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+        for row in rows:
+            row["send_time"] = from_db(row["send_time"])
+        return rows
+
+    async def complete_reminders(self, reminder_ids):
+        if not reminder_ids:
+            return
+        placeholders = ", ".join(["%s"] * len(reminder_ids))
+        await self.execute(
+            f"DELETE FROM reminders WHERE claimed_by = %s AND id IN ({placeholders})",
+            [self.instance_id] + list(reminder_ids)
+        )
+
+    async def reminders_due(self, after, until):
+        query = "SELECT id, send_time FROM reminders WHERE send_time <= %s"
+        params = [to_db(until)]
+        if after:
+            query += " AND send_time > %s"
+            params.append(to_db(after))
+        rows = await self.fetchall(query + " ORDER BY send_time", params)
+        for row in rows:
+            row["send_time"] = from_db(row["send_time"])
+        return rows
@@ -0,0 +1,558 @@
+import os
+import re
+from datetime import timedelta
+from contextlib import asynccontextmanager
+import asyncpg
+from .base import Migration, Storage, WIB, keyset_page
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 2))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 10))
+DB_ACQUIRE_TIMEOUT = float(os.getenv("DB_ACQUIRE_TIMEOUT", 10))
+DB_STATEMENT_CACHE = int(os.getenv("DB_STATEMENT_CACHE", 100))
+EXPORT_FETCH_SIZE = 500
+
+
+def from_db(value):
+    return value.astimezone(WIB) if value else None
+
+
+MIGRATIONS = (
+    Migration(1, "skema awal", [
+        """
+        CREATE TABLE IF NOT EXISTS todos (
+            id SERIAL PRIMARY KEY,
+            user_id BIGINT NOT NULL,
+            task_date DATE NOT NULL,
+            task TEXT NOT NULL,
+            done BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMPTZ DEFAULT NOW()
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS music_history (
+            id SERIAL PRIMARY KEY,
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            title TEXT NOT NULL,
+            url TEXT,
+            action TEXT,
+            created_at TIMESTAMPTZ DEFAULT NOW()
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS attendance (
+            id SERIAL PRIMARY KEY,
+            user_id BIGINT NOT NULL,
+            username TEXT NOT NULL,
+            guild_id BIGINT NOT NULL,
+            checkin_time TIMESTAMPTZ DEFAULT NOW(),
+            checkout_time TIMESTAMPTZ,
+            work_duration INTERVAL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS reminders (
+            id SERIAL PRIMARY KEY,
+            user_id BIGINT NOT NULL,
+            channel_id BIGINT NOT NULL,
+            message TEXT NOT NULL,
+            send_time TIMESTAMPTZ NOT NULL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS ytdlp_cache (
+            query_key TEXT PRIMARY KEY,
+            video_id TEXT,
+            title TEXT NOT NULL,
+            audio_url TEXT NOT NULL,
+            expire BIGINT NOT NULL,
+            updated_at TIMESTAMPTZ DEFAULT NOW()
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS music_queues (
+            guild_id BIGINT PRIMARY KEY,
+            queue_json TEXT NOT NULL,
+            updated_at TIMESTAMPTZ DEFAULT NOW()
+        );
+        """,
+    ]),
+    # CONCURRENTLY: tabel besar tidak dikunci dari tulis selama index dibangun (tidak boleh dalam transaksi)
+    Migration(2, "index todos, music_history, attendance, reminders", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_todos_user_date ON todos (user_id, task_date);",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_music_history_guild_created ON music_history (guild_id, created_at);",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_attendance_user_guild_checkin ON attendance (user_id, guild_id, checkin_time);",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reminders_send_time ON reminders (send_time);",
+    ], transactional=False),
+    Migration(3, "attendance.work_date", [
+        "ALTER TABLE attendance ADD COLUMN IF NOT EXISTS work_date DATE;",
+        "UPDATE attendance SET work_date = (checkin_time AT TIME ZONE 'Asia/Jakarta')::date WHERE work_date IS NULL;",
+    ]),
+    # Index parsial hanya berisi sesi yang belum checkout, jadi tetap kecil walau riwayat absensi panjang
+    Migration(4, "index work_date & sesi terbuka", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_attendance_user_guild_workdate ON attendance (user_id, guild_id, work_date);",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_attendance_open ON attendance (work_date) WHERE checkout_time IS NULL;",
+    ], transactional=False),
+    # Keyset /dates: (user_id, task_date, id) memenuhi WHERE + ORDER BY langsung dari index
+    Migration(5, "index keyset todos", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_todos_user_date_id ON todos (user_id, task_date, id);",
+        "DROP INDEX CONCURRENTLY IF EXISTS idx_todos_user_date;",
+    ], transactional=False),
+    # Laporan guild: GROUP BY user_id per guild & rentang work_date langsung dari index
+    Migration(6, "index laporan absensi guild", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_attendance_guild_workdate ON attendance (guild_id, work_date, user_id);",
+    ], transactional=False),
+    # Rollup harian: laporan membaca satu baris per (guild, user, hari), bukan sesi mentah
+    Migration(7, "rollup attendance_daily", [
+        """
+        CREATE TABLE IF NOT EXISTS attendance_daily (
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            work_date DATE NOT NULL,
+            username TEXT NOT NULL,
+            first_checkin TIMESTAMPTZ NOT NULL,
+            last_checkout TIMESTAMPTZ NOT NULL,
+            total_seconds BIGINT NOT NULL DEFAULT 0,
+            sessions INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, work_date, user_id)
+        );
+        """,
+        """
+        INSERT INTO attendance_daily
+            (guild_id, user_id, work_date, username, first_checkin, last_checkout, total_seconds, sessions)
+        SELECT guild_id, user_id, work_date, MAX(username), MIN(checkin_time), MAX(checkout_time),
+               COALESCE(SUM(EXTRACT(EPOCH FROM work_duration)), 0)::bigint, COUNT(*)
+        FROM attendance
+        WHERE checkout_time IS NOT NULL
+        GROUP BY guild_id, user_id, work_date
+        ON CONFLICT DO NOTHING;
+        """,
+    ]),
+    # Reconciler membaca attendance per rentang work_date lintas guild
+    Migration(8, "index work_date attendance", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_attendance_work_date ON attendance (work_date);",
+    ], transactional=False),
+)
+CONCURRENT_INDEX_PATTERN = re.compile(r"CREATE INDEX CONCURRENTLY IF NOT EXISTS (\w+)")
+MIGRATION_LOCK_KEY = 7305102  # kunci advisory untuk migrasi
+
+
+class PostgresStorage(Storage):
+    name = "postgres"
+    migrations = MIGRATIONS
+
+    def __init__(self):
+        self.pool = None
+
+    async def connect(self):
+        if self.pool is not None:
+            return
+        # min_size koneksi langsung dibuka di sini (pre-warm), bukan saat command pertama
+        self.pool = await asyncpg.create_pool(
+            DATABASE_URL,
+            min_size=DB_POOL_MIN,
+            max_size=DB_POOL_MAX,
+            statement_cache_size=DB_STATEMENT_CACHE,
+            max_inactive_connection_lifetime=300
+        )
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    def acquire(self):
+        return self.pool.acquire(timeout=DB_ACQUIRE_TIMEOUT)
+
+    async def execute(self, query, *args):
+        async with self.acquire() as conn:
+            return await conn.execute(query, *args)
+
+    async def fetch(self, query, *args):
+        async with self.acquire() as conn:
+            return [dict(row) for row in await conn.fetch(query, *args)]
+
+    async def fetchrow(self, query, *args):
+        async with self.acquire() as conn:
+            row = await conn.fetchrow(query, *args)
+        return dict(row) if row else None
+
+    async def stream(self, query, *args):
+        """Cursor server-side (butuh transaksi); baris diambil per EXPORT_FETCH_SIZE."""
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                async for row in conn.cursor(query, *args, prefetch=EXPORT_FETCH_SIZE):
+                    yield dict(row)
+
+    @asynccontextmanager
+    async def migration_lock(self):
+        async with self.acquire() as conn:
+            await conn.execute("SELECT pg_advisory_lock($1);", MIGRATION_LOCK_KEY)
+            try:
+                yield
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1);", MIGRATION_LOCK_KEY)
+
+    async def schema_version(self):
+        await self.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMPTZ DEFAULT NOW()
+            );
+        """)
+        async with self.acquire() as conn:
+            return await conn.fetchval("SELECT COALESCE(MAX(version), 0) FROM schema_version;")
+
+    async def apply_migration(self, migration):
+        async with self.acquire() as conn:
+            if migration.transactional:
+                async with conn.transaction():
+                    for statement in migration.statements:
+                        await conn.execute(statement)
+                    await self.record_migration(conn, migration)
+                return
+            await self.drop_invalid_indexes(conn, migration)
+            for statement in migration.statements:
+                await conn.execute(statement)
+            await self.record_migration(conn, migration)
+
+    async def drop_invalid_indexes(self, conn, migration):
+        """CONCURRENTLY yang terputus meninggalkan index INVALID; IF NOT EXISTS akan melewatinya, jadi dibuang dulu."""
+        names = [m.group(1) for m in map(CONCURRENT_INDEX_PATTERN.search, migration.statements) if m]
+        invalid = await conn.fetch("""
+            SELECT c.relname FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE NOT i.indisvalid AND c.relname = ANY($1::text[]);
+        """, names)
+        for row in invalid:
+            print(f"[DB] Index {row['relname']} tidak valid dari migrasi sebelumnya, dibuat ulang.")
+            await conn.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{row["relname"]}";')
+
+    async def record_migration(self, conn, migration):
+        await conn.execute(
+            "INSERT INTO schema_version (version, description) VALUES ($1, $2);",
+            migration.version, migration.description
+        )
+
+    # ---------- To-do ----------
+    async def add_todo(self, user_id, task_date, task, created_at):
+        await self.execute(
+            "INSERT INTO todos (user_id, task_date, task, done, created_at) VALUES ($1, $2, $3, FALSE, $4);",
+            user_id, task_date, task, created_at
+        )
+
+    async def list_todos(self, user_id, task_date):
+        return await self.fetch(
+            "SELECT id, task, done FROM todos WHERE user_id=$1 AND task_date=$2 ORDER BY id;",
+            user_id, task_date
+        )
+
+    async def set_todo_done(self, user_id, task_id):
+        async with self.acquire() as conn:
+            return await conn.fetchval(
+                "UPDATE todos SET done=TRUE WHERE id=$1 AND user_id=$2 RETURNING task_date;", task_id, user_id
+            )
+
+    async def delete_todo(self, user_id, task_id):
+        async with self.acquire() as conn:
+            return await conn.fetchval(
+                "DELETE FROM todos WHERE id=$1 AND user_id=$2 RETURNING task_date;", task_id, user_id
+            )
+
+    async def clear_todos(self, user_id, task_date):
+        result = await self.execute("DELETE FROM todos WHERE user_id=$1 AND task_date=$2;", user_id, task_date)
+        return int(result.split()[-1])
+
+    async def todos_page(self, user_id, limit, after=None, before=None):
+        query = "SELECT id, task_date, task, done FROM todos WHERE user_id=$1"
+        params = [user_id]
+        cursor_key = after or before
+        if cursor_key:
+            params += list(cursor_key)
+            query += f" AND (task_date, id) {'>' if after else '<'} ($2, $3)"
+        order = "DESC" if before else "ASC"
+        params.append(limit + 1)
+        query += f" ORDER BY task_date {order}, id {order} LIMIT ${len(params)};"
+        return keyset_page(await self.fetch(query, *params), limit, bool(before))
+
+    async def iter_todos(self, user_id, start=None, end=None):
+        query = "SELECT task_date, task, done, created_at FROM todos WHERE user_id=$1"
+        params = [user_id]
+        if start:
+            params.append(start)
+            query += f" AND task_date >= ${len(params)}"
+        if end:
+            params.append(end)
+            query += f" AND task_date <= ${len(params)}"
+        query += " ORDER BY task_date ASC, id ASC;"
+        async for row in self.stream(query, *params):
+            row["created_at"] = from_db(row["created_at"])
+            yield row
+
+    # ---------- Musik ----------
+    async def load_cached_track(self, query_key):
+        return await self.fetchrow(
+            "SELECT video_id, title, audio_url AS url, expire FROM ytdlp_cache WHERE query_key=$1;",
+            query_key
+        )
+
+    async def save_cached_track(self, query_key, track):
+        await self.execute(
+            """INSERT INTO ytdlp_cache (query_key, video_id, title, audio_url, expire, updated_at)
+               VALUES ($1, $2, $3, $4, $5, NOW())
+               ON CONFLICT (query_key) DO UPDATE SET video_id=EXCLUDED.video_id, title=EXCLUDED.title,
+                   audio_url=EXCLUDED.audio_url, expire=EXCLUDED.expire, updated_at=NOW();""",
+            query_key, track["video_id"], track["title"], track["url"], track["expire"]
+        )
+
+    async def insert_music_history(self, rows):
+        # COPY: satu round-trip, tanpa parsing INSERT per baris
+        async with self.acquire() as conn:
+            await conn.copy_records_to_table(
+                "music_history",
+                records=rows,
+                columns=["guild_id", "user_id", "title", "url", "action", "created_at"]
+            )
+
+    async def recent_music_history(self, guild_id, limit):
+        rows = await self.fetch(
+            """
+            SELECT title, action, created_at
+            FROM music_history
+            WHERE guild_id = $1
+            ORDER BY created_at DESC
+            LIMIT $2;
+            """,
+            guild_id, limit
+        )
+        for row in rows:
+            row["created_at"] = from_db(row["created_at"])
+        return rows
+
+    async def load_saved_queue(self, guild_id):
+        async with self.acquire() as conn:
+            return await conn.fetchval("SELECT queue_json FROM music_queues WHERE guild_id=$1;", guild_id)
+
+    async def save_queue_snapshots(self, upserts, deletes):
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                if upserts:
+                    await conn.executemany(
+                        """INSERT INTO music_queues (guild_id, queue_json, updated_at) VALUES ($1, $2, NOW())
+                           ON CONFLICT (guild_id) DO UPDATE SET queue_json=EXCLUDED.queue_json, updated_at=NOW();""",
+                        upserts
+                    )
+                if deletes:
+                    await conn.execute("DELETE FROM music_queues WHERE guild_id = ANY($1::bigint[]);", deletes)
+
+    # ---------- Absensi ----------
+    async def add_checkin(self, user_id, username, guild_id, checkin_time, work_date):
+        row = await self.fetchrow("""
+            INSERT INTO attendance (user_id, username, guild_id, checkin_time, work_date)
+            VALUES ($1, $2, $3, $4, $5)
+            RETURNING id
+        """, user_id, username, guild_id, checkin_time, work_date)
+        return row["id"]
+
+    async def find_attendance(self, user_id, guild_id, work_date):
+        row = await self.fetchrow("""
+            SELECT id, checkin_time, checkout_time
+            FROM attendance
+            WHERE user_id = $1 AND guild_id = $2 AND work_date = $3
+            ORDER BY checkin_time DESC LIMIT 1
+        """, user_id, guild_id, work_date)
+        if row:
+            row["checkin_time"] = from_db(row["checkin_time"])
+            row["checkout_time"] = from_db(row["checkout_time"])
+        return row
+
+    async def open_attendance(self, work_date):
+        rows = await self.fetch("""
+            SELECT id, user_id, guild_id, checkin_time
+            FROM attendance
+            WHERE work_date = $1 AND checkout_time IS NULL
+        """, work_date)
+        for row in rows:
+            row["checkin_time"] = from_db(row["checkin_time"])
+        return rows
+
+    async def set_checkout(self, attendance_id, checkout_time, work_duration):
+        # Checkout dan rollup satu transaksi: reconcile tidak pernah melihat yang satu tanpa yang lain
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                result = await conn.execute(
+                    "UPDATE attendance SET checkout_time = $1, work_duration = $2 WHERE id = $3 AND checkout_time IS NULL",
+                    checkout_time, work_duration, attendance_id
+                )
+                if result != "UPDATE 1":
+                    return False
+                await conn.execute("""
+                    INSERT INTO attendance_daily
+                        (guild_id, user_id, work_date, username, first_checkin, last_checkout, total_seconds, sessions)
+                    SELECT guild_id, user_id, work_date, username, checkin_time, checkout_time,
+                           EXTRACT(EPOCH FROM work_duration)::bigint, 1
+                    FROM attendance
+                    WHERE id = $1
+                    ON CONFLICT (guild_id, work_date, user_id) DO UPDATE SET
+                        username = EXCLUDED.username,
+                        first_checkin = LEAST(attendance_daily.first_checkin, EXCLUDED.first_checkin),
+                        last_checkout = GREATEST(attendance_daily.last_checkout, EXCLUDED.last_checkout),
+                        total_seconds = attendance_daily.total_seconds + EXCLUDED.total_seconds,
+                        sessions = attendance_daily.sessions + 1;
+                """, attendance_id)
+        return True
+
+    async def recent_attendance(self, user_id, limit):
+        rows = await self.fetch("""
+            SELECT checkin_time, checkout_time, work_duration
+            FROM attendance
+            WHERE user_id = $1
+            ORDER BY checkin_time DESC
+            LIMIT $2
+        """, user_id, limit)
+        for row in rows:
+            row["checkin_time"] = from_db(row["checkin_time"])
+            row["checkout_time"] = from_db(row["checkout_time"])
+        return rows
+
+    async def iter_attendance(self, user_id, guild_id, start=None, end=None):
+        query = """
+            SELECT checkin_time, checkout_time, work_duration
+            FROM attendance
+            WHERE user_id = $1 AND guild_id = $2
+        """
+        params = [user_id, guild_id]
+        if start:
+            params.append(start)
+            query += f" AND checkin_time >= ${len(params)}"
+        if end:
+            params.append(end)
+            query += f" AND checkin_time < ${len(params)}"
+        query += " ORDER BY checkin_time DESC"
+        async for row in self.stream(query, *params):
+            row["checkin_time"] = from_db(row["checkin_time"])
+            row["checkout_time"] = from_db(row["checkout_time"])
+            yield row
+
+    @staticmethod
+    def guild_range(params, start, end):
+        """params sudah berisi guild_id di posisi $1 (dan parameter lain sebelum filter tanggal)."""
+        where = "WHERE guild_id = $1"
+        if start:
+            params.append(start)
+            where += f" AND work_date >= ${len(params)}"
+        if end:
+            params.append(end)
+            where += f" AND work_date <= ${len(params)}"
+        return where
+
+    async def reconcile_attendance_daily(self, since):
+        # Status "DELETE n" / "INSERT 0 n": n hanya baris yang benar-benar ditulis (WHERE di upsert)
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                deleted = await conn.execute("""
+                    DELETE FROM attendance_daily d
+                    WHERE d.work_date >= $1 AND NOT EXISTS (
+                        SELECT 1 FROM attendance a
+                        WHERE a.guild_id = d.guild_id AND a.user_id = d.user_id
+                          AND a.work_date = d.work_date AND a.checkout_time IS NOT NULL
+                    );
+                """, since)
+                upserted = await conn.execute("""
+                    INSERT INTO attendance_daily
+                        (guild_id, user_id, work_date, username, first_checkin, last_checkout, total_seconds, sessions)
+                    SELECT guild_id, user_id, work_date, MAX(username), MIN(checkin_time), MAX(checkout_time),
+                           COALESCE(SUM(EXTRACT(EPOCH FROM work_duration)), 0)::bigint, COUNT(*)
+                    FROM attendance
+                    WHERE work_date >= $1 AND checkout_time IS NOT NULL
+                    GROUP BY guild_id, user_id, work_date
+                    ON CONFLICT (guild_id, work_date, user_id) DO UPDATE SET
+                        username = EXCLUDED.username,
+                        first_checkin = EXCLUDED.first_checkin,
+                        last_checkout = EXCLUDED.last_checkout,
+                        total_seconds = EXCLUDED.total_seconds,
+                        sessions = EXCLUDED.sessions
+                    WHERE (attendance_daily.total_seconds, attendance_daily.sessions,
+                           attendance_daily.first_checkin, attendance_daily.last_checkout)
+                        IS DISTINCT FROM (EXCLUDED.total_seconds, EXCLUDED.sessions,
+                                          EXCLUDED.first_checkin, EXCLUDED.last_checkout);
+                """, since)
+        return int(deleted.split()[-1]) + int(upserted.split()[-1])
+
+    async def guild_attendance_summary(self, guild_id, start, end, late_after):
+        params = [guild_id, late_after]
+        where = self.guild_range(params, start, end)
+        rows = await self.fetch(f"""
+            SELECT user_id,
+                   MAX(username) AS username,
+                   COUNT(*) AS days_present,
+                   SUM(total_seconds)::float8 AS total_seconds,
+                   SUM(total_seconds)::float8 / NULLIF(SUM(sessions), 0) AS avg_seconds,
+                   COUNT(*) FILTER (WHERE (first_checkin AT TIME ZONE 'Asia/Jakarta')::time > $2) AS late_count
+            FROM attendance_daily
+            {where}
+            GROUP BY user_id
+            ORDER BY username;
+        """, *params)
+        for row in rows:
+            total, avg = row.pop("total_seconds"), row.pop("avg_seconds")
+            row["total_duration"] = timedelta(seconds=total or 0)
+            row["avg_duration"] = timedelta(seconds=avg) if avg is not None else None
+        return rows
+
+    async def iter_guild_attendance(self, guild_id, start, end):
+        params = [guild_id]
+        where = self.guild_range(params, start, end)
+        query = f"""
+            SELECT work_date, user_id, username, checkin_time, checkout_time, work_duration
+            FROM attendance
+            {where}
+            ORDER BY work_date, checkin_time
+        """
+        async for row in self.stream(query, *params):
+            row["checkin_time"] = from_db(row["checkin_time"])
+            row["checkout_time"] = from_db(row["checkout_time"])
+            yield row
+
+    # ---------- Reminder ----------
+    async def add_reminder(self, user_id, channel_id, message, send_time):
+        row = await self.fetchrow("""
+            INSERT INTO reminders (user_id, channel_id, message, send_time)
+            VALUES ($1, $2, $3, $4)
+            RETURNING id;
+        """, user_id, channel_id, message, send_time)
+        return row["id"]
+
+    async def claim_due_reminders(self, now, limit):
+        # Satu statement: baris yang sedang dikunci worker lain dilewati (SKIP LOCKED), bukan ditunggu
+        rows = await self.fetch("""
+            DELETE FROM reminders
+            WHERE id IN (
+                SELECT id FROM reminders
+                WHERE send_time <= $1
+                ORDER BY send_time
+                LIMIT $2
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, user_id, channel_id, message, send_time;
+        """, now, limit)
+        for row in rows:
+            row["send_time"] = from_db(row["send_time"])
+        rows.sort(key=lambda row: row["send_time"])  # urutan RETURNING tidak dijamin
+        return rows
+
+    async def complete_reminders(self, reminder_ids):
+        pass  # sudah dihapus saat diklaim
+
+    async def reminders_due(self, after, until):
+        query = "SELECT id, send_time FROM reminders WHERE send_time <= $1"
+        params = [until]
+        if after:
+            params.append(after)
+            query += " AND send_time > $2"
+        rows = await self.fetch(query + " ORDER BY send_time;", *params)
+        for row in rows:
+            row["send_time"] = from_db(row["send_time"])
+        return rows
@@ -0,0 +1,563 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, date, timedelta
+import aiosqlite
+from .base import Migration, Storage, WIB, keyset_page
+
+SQLITE_PATH = os.getenv("SQLITE_PATH", "bot.db")  # ":memory:" untuk benchmark tanpa file
+SQLITE_MIN_VERSION = (3, 35, 0)  # UPDATE/DELETE ... RETURNING
+
+
+def to_db(value):
+    """Waktu disimpan sebagai teks ISO WIB dengan lebar tetap supaya urutan teks = urutan waktu."""
+    return value.astimezone(WIB).isoformat(timespec="microseconds") if value else None
+
+
+def from_db(value):
+    return datetime.fromisoformat(value).astimezone(WIB) if value else None
+
+
+def duration_to_db(value):
+    return value.total_seconds() if value is not None else None
+
+
+def duration_from_db(value):
+    return timedelta(seconds=value) if value is not None else None
+
+
+MIGRATIONS = (
+    Migration(1, "skema awal", [
+        """
+        CREATE TABLE IF NOT EXISTS todos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            task_date TEXT NOT NULL,
+            task TEXT NOT NULL,
+            done INTEGER DEFAULT 0,
+            created_at TEXT
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_user_date ON todos (user_id, task_date);",
+        """
+        CREATE TABLE IF NOT EXISTS music_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            url TEXT,
+            action TEXT,
+            created_at TEXT
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_guild ON music_history (guild_id);",
+        """
+        CREATE TABLE IF NOT EXISTS attendance (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            username TEXT NOT NULL,
+            guild_id INTEGER NOT NULL,
+            checkin_time TEXT,
+            checkout_time TEXT,
+            work_duration REAL
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_user_guild ON attendance (user_id, guild_id);",
+        """
+        CREATE TABLE IF NOT EXISTS reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            message TEXT NOT NULL,
+            send_time TEXT NOT NULL
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_send_time ON reminders (send_time);",
+        """
+        CREATE TABLE IF NOT EXISTS ytdlp_cache (
+            query_key TEXT PRIMARY KEY,
+            video_id TEXT,
+            title TEXT NOT NULL,
+            audio_url TEXT NOT NULL,
+            expire INTEGER NOT NULL,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS music_queues (
+            guild_id INTEGER PRIMARY KEY,
+            queue_json TEXT NOT NULL,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+    ]),
+    Migration(2, "index komposit music_history & attendance", [
+        "CREATE INDEX IF NOT EXISTS idx_guild_created ON music_history (guild_id, created_at);",
+        "DROP INDEX IF EXISTS idx_guild;",
+        "CREATE INDEX IF NOT EXISTS idx_user_guild_checkin ON attendance (user_id, guild_id, checkin_time);",
+        "DROP INDEX IF EXISTS idx_user_guild;",
+    ]),
+    # checkin_time disimpan sebagai ISO WIB, 10 karakter pertama = tanggal lokal
+    Migration(3, "attendance.work_date & index sesi terbuka", [
+        "ALTER TABLE attendance ADD COLUMN work_date TEXT;",
+        "UPDATE attendance SET work_date = substr(checkin_time, 1, 10) WHERE work_date IS NULL;",
+        "CREATE INDEX IF NOT EXISTS idx_user_guild_workdate ON attendance (user_id, guild_id, work_date);",
+        "CREATE INDEX IF NOT EXISTS idx_attendance_open ON attendance (work_date) WHERE checkout_time IS NULL;",
+    ]),
+    Migration(4, "index laporan absensi guild", [
+        "CREATE INDEX IF NOT EXISTS idx_guild_workdate ON attendance (guild_id, work_date, user_id);",
+    ]),
+    # Rollup harian: laporan membaca satu baris per (guild, user, hari), bukan sesi mentah
+    Migration(5, "rollup attendance_daily", [
+        """
+        CREATE TABLE IF NOT EXISTS attendance_daily (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            work_date TEXT NOT NULL,
+            username TEXT NOT NULL,
+            first_checkin TEXT NOT NULL,
+            last_checkout TEXT NOT NULL,
+            total_seconds REAL NOT NULL DEFAULT 0,
+            sessions INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (guild_id, work_date, user_id)
+        );
+        """,
+        """
+        INSERT OR IGNORE INTO attendance_daily
+            (guild_id, user_id, work_date, username, first_checkin, last_checkout, total_seconds, sessions)
+        SELECT guild_id, user_id, work_date, MAX(username), MIN(checkin_time), MAX(checkout_time),
+               COALESCE(SUM(work_duration), 0), COUNT(*)
+        FROM attendance
+        WHERE checkout_time IS NOT NULL
+        GROUP BY guild_id, user_id, work_date;
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_attendance_work_date ON attendance (work_date);",
+    ]),
+)
+
+
+class SQLiteStorage(Storage):
+    """Backend satu file (atau in-memory) untuk instalasi kecil dan benchmark tanpa server DB.
+
+    aiosqlite menjalankan satu koneksi di thread tersendiri, jadi semua coroutine berbagi satu
+    transaksi. Setiap statement tulis lewat lock: statement tunggal tidak bisa menyusup ke tengah
+    BEGIN…COMMIT coroutine lain (lalu ikut ter-ROLLBACK bersamanya).
+    """
+
+    name = "sqlite"
+    migrations = MIGRATIONS
+
+    def __init__(self, path=None):
+        self.path = path or SQLITE_PATH
+        self.db = None
+        self.lock = asyncio.Lock()
+
+    async def connect(self):
+        if self.db is not None:
+            return
+        if aiosqlite.sqlite_version_info < SQLITE_MIN_VERSION:
+            raise RuntimeError(
+                f"SQLite {aiosqlite.sqlite_version} terlalu lama; backend sqlite butuh "
+                f"{'.'.join(map(str, SQLITE_MIN_VERSION))}+ (RETURNING)"
+            )
+        self.db = await aiosqlite.connect(self.path, isolation_level=None)
+        self.db.row_factory = aiosqlite.Row
+        await self.db.execute("PRAGMA journal_mode=WAL")
+        await self.db.execute("PRAGMA synchronous=NORMAL")
+        await self.db.execute("PRAGMA foreign_keys=ON")
+
+    async def close(self):
+        if self.db is not None:
+            await self.db.close()
+            self.db = None
+
+    async def execute(self, query, params=()):
+        async with self.lock:
+            async with self.db.execute(query, params) as cursor:
+                return cursor.rowcount, cursor.lastrowid
+
+    async def fetchall(self, query, params=()):
+        # Ikut lock juga: fetchall dipakai untuk ... RETURNING yang sebenarnya menulis
+        async with self.lock:
+            async with self.db.execute(query, params) as cursor:
+                return [dict(row) for row in await cursor.fetchall()]
+
+    async def fetchone(self, query, params=()):
+        async with self.lock:
+            async with self.db.execute(query, params) as cursor:
+                row = await cursor.fetchone()
+        return dict(row) if row else None
+
+    @asynccontextmanager
+    async def transaction(self):
+        """BEGIN…COMMIT di bawah lock. Di dalam blok pakai koneksi yang di-yield langsung,
+        bukan self.execute/fetch* (lock tidak reentrant)."""
+        async with self.lock:
+            await self.db.execute("BEGIN")
+            try:
+                yield self.db
+            except BaseException:
+                await self.db.execute("ROLLBACK")
+                raise
+            await self.db.execute("COMMIT")
+
+    async def stream(self, query, params=()):
+        # Hanya untuk SELECT export; tidak memegang lock supaya export panjang tidak menahan bot
+        async with self.db.execute(query, params) as cursor:
+            async for row in cursor:
+                yield dict(row)
+
+    async def schema_version(self):
+        await self.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        row = await self.fetchone("SELECT COALESCE(MAX(version), 0) AS version FROM schema_version")
+        return row["version"]
+
+    async def apply_migration(self, migration):
+        # DDL SQLite transaksional: migrasi yang gagal tidak meninggalkan skema setengah jadi
+        async with self.transaction() as db:
+            for statement in migration.statements:
+                await db.execute(statement)
+            await db.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (migration.version, migration.description)
+            )
+
+    # ---------- To-do ----------
+    async def add_todo(self, user_id, task_date, task, created_at):
+        await self.execute(
+            "INSERT INTO todos (user_id, task_date, task, done, created_at) VALUES (?, ?, ?, 0, ?)",
+            (user_id, task_date.isoformat(), task, to_db(created_at))
+        )
+
+    async def list_todos(self, user_id, task_date):
+        rows = await self.fetchall(
+            "SELECT id, task, done FROM todos WHERE user_id=? AND task_date=? ORDER BY id",
+            (user_id, task_date.isoformat())
+        )
+        for row in rows:
+            row["done"] = bool(row["done"])
+        return rows
+
+    async def set_todo_done(self, user_id, task_id):
+        row = await self.fetchone(
+            "UPDATE todos SET done=1 WHERE id=? AND user_id=? RETURNING task_date", (task_id, user_id)
+        )
+        return date.fromisoformat(row["task_date"]) if row else None
+
+    async def delete_todo(self, user_id, task_id):
+        row = await self.fetchone(
+            "DELETE FROM todos WHERE id=? AND user_id=? RETURNING task_date", (task_id, user_id)
+        )
+        return date.fromisoformat(row["task_date"]) if row else None
+
+    async def clear_todos(self, user_id, task_date):
+        affected, _ = await self.execute(
+            "DELETE FROM todos WHERE user_id=? AND task_date=?", (user_id, task_date.isoformat())
+        )
+        return affected
+
+    async def todos_page(self, user_id, limit, after=None, before=None):
+        # rowid (= id) ikut tersimpan di index idx_user_date, jadi urutan (task_date, id) dari index
+        query = "SELECT id, task_date, task, done FROM todos WHERE user_id=?"
+        params = [user_id]
+        cursor_key = after or before
+        if cursor_key:
+            op = ">" if after else "<"
+            query += f" AND (task_date {op} ? OR (task_date = ? AND id {op} ?))"
+            params += [cursor_key[0].isoformat(), cursor_key[0].isoformat(), cursor_key[1]]
+        order = "DESC" if before else "ASC"
+        query += f" ORDER BY task_date {order}, id {order} LIMIT ?"
+        params.append(limit + 1)
+        rows = await self.fetchall(query, params)
+        for row in rows:
+            row["task_date"] = date.fromisoformat(row["task_date"])
+            row["done"] = bool(row["done"])
+        return keyset_page(rows, limit, bool(before))
+
+    async def iter_todos(self, user_id, start=None, end=None):
+        query = "SELECT task_date, task, done, created_at FROM todos WHERE user_id=?"
+        params = [user_id]
+        if start:
+            query += " AND task_date >= ?"
+            params.append(start.isoformat())
+        if end:
+            query += " AND task_date <= ?"
+            params.append(end.isoformat())
+        query += " ORDER BY task_date ASC, id ASC"
+        async for row in self.stream(query, params):
+            row["task_date"] = date.fromisoformat(row["task_date"])
+            row["done"] = bool(row["done"])
+            row["created_at"] = from_db(row["created_at"])
+            yield row
+
+    # ---------- Musik ----------
+    async def load_cached_track(self, query_key):
+        return await self.fetchone(
+            "SELECT video_id, title, audio_url AS url, expire FROM ytdlp_cache WHERE query_key=?",
+            (query_key,)
+        )
+
+    async def save_cached_track(self, query_key, track):
+        await self.execute(
+            """INSERT INTO ytdlp_cache (query_key, video_id, title, audio_url, expire, updated_at)
+               VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+               ON CONFLICT (query_key) DO UPDATE SET video_id=excluded.video_id, title=excluded.title,
+                   audio_url=excluded.audio_url, expire=excluded.expire, updated_at=CURRENT_TIMESTAMP""",
+            (query_key, track["video_id"], track["title"], track["url"], track["expire"])
+        )
+
+    async def insert_music_history(self, rows):
+        async with self.transaction() as db:
+            await db.executemany(
+                """INSERT INTO music_history (guild_id, user_id, title, url, action, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                [(*row[:5], to_db(row[5])) for row in rows]
+            )
+
+    async def recent_music_history(self, guild_id, limit):
+        rows = await self.fetchall(
+            """
+            SELECT title, action, created_at
+            FROM music_history
+            WHERE guild_id = ?
+            ORDER BY created_at DESC
+            LIMIT ?
+            """,
+            (guild_id, limit)
+        )
+        for row in rows:
+            row["created_at"] = from_db(row["created_at"])
+        return rows
+
+    async def load_saved_queue(self, guild_id):
+        row = await self.fetchone("SELECT queue_json FROM music_queues WHERE guild_id=?", (guild_id,))
+        return row["queue_json"] if row else None
+
+    async def save_queue_snapshots(self, upserts, deletes):
+        async with self.transaction() as db:
+            if upserts:
+                await db.executemany(
+                    """INSERT INTO music_queues (guild_id, queue_json, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+                       ON CONFLICT (guild_id) DO UPDATE SET queue_json=excluded.queue_json,
+                           updated_at=CURRENT_TIMESTAMP""",
+                    upserts
+                )
+            if deletes:
+                placeholders = ", ".join(["?"] * len(deletes))
+                await db.execute(f"DELETE FROM music_queues WHERE guild_id IN ({placeholders})", deletes)
+
+    # ---------- Absensi ----------
+    async def add_checkin(self, user_id, username, guild_id, checkin_time, work_date):
+        _, attendance_id = await self.execute(
+            """INSERT INTO attendance (user_id, username, guild_id, checkin_time, work_date)
+               VALUES (?, ?, ?, ?, ?)""",
+            (user_id, username, guild_id, to_db(checkin_time), work_date.isoformat())
+        )
+        return attendance_id
+
+    async def find_attendance(self, user_id, guild_id, work_date):
+        row = await self.fetchone("""
+            SELECT id, checkin_time, checkout_time
+            FROM attendance
+            WHERE user_id = ? AND guild_id = ? AND work_date = ?
+            ORDER BY checkin_time DESC LIMIT 1
+        """, (user_id, guild_id, work_date.isoformat()))
+        if row:
+            row["checkin_time"] = from_db(row["checkin_time"])
+            row["checkout_time"] = from_db(row["checkout_time"])
+        return row
+
+    async def open_attendance(self, work_date):
+        rows = await self.fetchall("""
+            SELECT id, user_id, guild_id, checkin_time
+            FROM attendance
+            WHERE work_date = ? AND checkout_time IS NULL
+        """, (work_date.isoformat(),))
+        for row in rows:
+            row["checkin_time"] = from_db(row["checkin_time"])
+        return rows
+
+    async def set_checkout(self, attendance_id, checkout_time, work_duration):
+        # Checkout dan rollup satu transaksi: reconcile tidak pernah melihat yang satu tanpa yang lain.
+        # Teks ISO WIB lebar tetap: MIN/MAX teks = MIN/MAX waktu
+        async with self.transaction() as db:
+            async with db.execute(
+                "UPDATE attendance SET checkout_time = ?, work_duration = ? WHERE id = ? AND checkout_time IS NULL",
+                (to_db(checkout_time), duration_to_db(work_duration), attendance_id)
+            ) as cursor:
+                affected = cursor.rowcount
+            if affected:
+                await db.execute("""
+                    INSERT INTO attendance_daily
+                        (guild_id, user_id, work_date, username, first_checkin, last_checkout, total_seconds, sessions)
+                    SELECT guild_id, user_id, work_date, username, checkin_time, checkout_time, work_duration, 1
+                    FROM attendance
+                    WHERE id = ?
+                    ON CONFLICT (guild_id, work_date, user_id) DO UPDATE SET
+                        username = excluded.username,
+                        first_checkin = MIN(first_checkin, excluded.first_checkin),
+                        last_checkout = MAX(last_checkout, excluded.last_checkout),
+                        total_seconds = total_seconds + excluded.total_seconds,
+                        sessions = sessions + 1
+                """, (attendance_id,))
+        return affected > 0
+
+    async def recent_attendance(self, user_id, limit):
+        rows = await self.fetchall("""
+            SELECT checkin_time, checkout_time, work_duration
+            FROM attendance
+            WHERE user_id = ?
+            ORDER BY checkin_time DESC
+            LIMIT ?
+        """, (user_id, limit))
+        for row in rows:
+            row["checkin_time"] = from_db(row["checkin_time"])
+            row["checkout_time"] = from_db(row["checkout_time"])
+            row["work_duration"] = duration_from_db(row["work_duration"])
+        return rows
+
+    async def iter_attendance(self, user_id, guild_id, start=None, end=None):
+        query = """
+            SELECT checkin_time, checkout_time, work_duration
+            FROM attendance
+            WHERE user_id = ? AND guild_id = ?
+        """
+        params = [user_id, guild_id]
+        if start:
+            query += " AND checkin_time >= ?"
+            params.append(to_db(start))
+        if end:
+            query += " AND checkin_time < ?"
+            params.append(to_db(end))
+        query += " ORDER BY checkin_time DESC"
+        async for row in self.stream(query, params):
+            row["checkin_time"] = from_db(row["checkin_time"])
+            row["checkout_time"] = from_db(row["checkout_time"])
+            row["work_duration"] = duration_from_db(row["work_duration"])
+            yield row
+
+    @staticmethod
+    def guild_range(guild_id, start, end):
+        where = "WHERE guild_id = ?"
+        params = [guild_id]
+        if start:
+            where += " AND work_date >= ?"
+            params.append(start.isoformat())
+        if end:
+            where += " AND work_date <= ?"
+            params.append(end.isoformat())
+        return where, params
+
+    async def reconcile_attendance_daily(self, since):
+        # rowcount = changes(): baris yang WHERE-nya gagal (nilai sama) tidak dihitung
+        async with self.transaction() as db:
+            async with db.execute("""
+                DELETE FROM attendance_daily
+                WHERE work_date >= ? AND NOT EXISTS (
+                    SELECT 1 FROM attendance a
+                    WHERE a.guild_id = attendance_daily.guild_id
+                      AND a.user_id = attendance_daily.user_id
+                      AND a.work_date = attendance_daily.work_date
+                      AND a.checkout_time IS NOT NULL
+                )
+            """, (since.isoformat(),)) as cursor:
+                affected = cursor.rowcount
+            async with db.execute("""
+                INSERT INTO attendance_daily
+                    (guild_id, user_id, work_date, username, first_checkin, last_checkout, total_seconds, sessions)
+                SELECT guild_id, user_id, work_date, MAX(username), MIN(checkin_time), MAX(checkout_time),
+                       COALESCE(SUM(work_duration), 0), COUNT(*)
+                FROM attendance
+                WHERE work_date >= ? AND checkout_time IS NOT NULL
+                GROUP BY guild_id, user_id, work_date
+                ON CONFLICT (guild_id, work_date, user_id) DO UPDATE SET
+                    username = excluded.username,
+                    first_checkin = excluded.first_checkin,
+                    last_checkout = excluded.last_checkout,
+                    total_seconds = excluded.total_seconds,
+                    sessions = excluded.sessions
+                WHERE (total_seconds, sessions, first_checkin, last_checkout)
+                    IS NOT (excluded.total_seconds, excluded.sessions, excluded.first_checkin, excluded.last_checkout)
+            """, (since.isoformat(),)) as cursor:
+                affected += cursor.rowcount
+        return affected
+
+    async def guild_attendance_summary(self, guild_id, start, end, late_after):
+        where, params = self.guild_range(guild_id, start, end)
+        # first_checkin ISO WIB: karakter 12-19 = jam lokal HH:MM:SS
+        rows = await self.fetchall(f"""
+            SELECT user_id,
+                   MAX(username) AS username,
+                   COUNT(*) AS days_present,
+                   SUM(total_seconds) AS total_duration,
+                   SUM(total_seconds) / SUM(sessions) AS avg_duration,
+                   SUM(substr(first_checkin, 12, 8) > ?) AS late_count
+            FROM attendance_daily
+            {where}
+            GROUP BY user_id
+            ORDER BY username
+        """, [late_after.strftime("%H:%M:%S")] + params)
+        for row in rows:
+            row["total_duration"] = duration_from_db(row["total_duration"])
+            row["avg_duration"] = duration_from_db(row["avg_duration"])
+        return rows
+
+    async def iter_guild_attendance(self, guild_id, start, end):
+        where, params = self.guild_range(guild_id, start, end)
+        query = f"""
+            SELECT work_date, user_id, username, checkin_time, checkout_time, work_duration
+            FROM attendance
+            {where}
+            ORDER BY work_date, checkin_time
+        """
+        async for row in self.stream(query, params):
+            row["work_date"] = date.fromisoformat(row["work_date"])
+            row["checkin_time"] = from_db(row["checkin_time"])
+            row["checkout_time"] = from_db(row["checkout_time"])
+            row["work_duration"] = duration_from_db(row["work_duration"])
+            yield row
+
+    # ---------- Reminder ----------
+    async def add_reminder(self, user_id, channel_id, message, send_time):
+        _, reminder_id = await self.execute(
+            "INSERT INTO reminders (user_id, channel_id, message, send_time) VALUES (?, ?, ?, ?)",
+            (user_id, channel_id, message, to_db(send_time))
+        )
+        return reminder_id
+
+    async def claim_due_reminders(self, now, limit):
+        # Satu statement di bawah lock: DELETE ... RETURNING sudah atomik (versi dicek di connect)
+        rows = await self.fetchall("""
+            DELETE FROM reminders
+            WHERE id IN (
+                SELECT id FROM reminders
+                WHERE send_time <= ?
+                ORDER BY send_time
+                LIMIT ?
+            )
+            RETURNING id, user_id, channel_id, message, send_time
+        """, (to_db(now), limit))
+        for row in rows:
+            row["send_time"] = from_db(row["send_time"])
+        rows.sort(key=lambda row: row["send_time"])  # urutan RETURNING tidak dijamin
+        return rows
+
+    async def complete_reminders(self, reminder_ids):
+        pass  # sudah dihapus saat diklaim
+
+    async def reminders_due(self, after, until):
+        query = "SELECT id, send_time FROM reminders WHERE send_time <= ?"
+        params = [to_db(until)]
+        if after:
+            query += " AND send_time > ?"
+            params.append(to_db(after))
+        rows = await self.fetchall(query + " ORDER BY send_time", params)
+        for row in rows:
+            row["send_time"] = from_db(row["send_time"])
+        return rows
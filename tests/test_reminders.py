@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from reminders import ReminderEngine
+from storage.base import WIB
+
+
+class LeaseStore:
+    """Store palsu: reminder tidak pernah muncul di reminders_due (sudah di luar jendela setiap
+    instance), hanya klaim yang bisa melihatnya setelah `claimable_after` kali percobaan."""
+
+    def __init__(self, claimable_after=0, complete_failures=0):
+        self.row = {"id": 1, "user_id": 1, "channel_id": 2, "message": "hi",
+                    "send_time": datetime.now(WIB) - timedelta(minutes=30)}
+        self.claimable_after = claimable_after
+        self.complete_failures = complete_failures
+        self.claims = 0
+        self.leased = False
+        self.done = False
+
+    async def reminders_due(self, after, until):
+        return []
+
+    async def claim_due_reminders(self, now, limit):
+        self.claims += 1
+        if self.done or self.leased or self.claims <= self.claimable_after:
+            return []
+        self.leased = True
+        return [self.row]
+
+    async def complete_reminders(self, reminder_ids):
+        if self.complete_failures:
+            self.complete_failures -= 1
+            self.leased = False  # lease dibiarkan kedaluwarsa
+            raise RuntimeError("koneksi putus")
+        self.done = True
+
+
+async def run_engine(store, seconds=0.5):
+    sent = []
+
+    async def send(reminder):
+        sent.append(reminder["id"])
+
+    engine = ReminderEngine(timedelta(minutes=10), 0.05, send)
+    engine.start(store)
+    await asyncio.sleep(seconds)
+    await engine.stop()
+    return sent
+
+
+def test_refill_tick_drains_expired_lease():
+    store = LeaseStore(claimable_after=2)
+    sent = asyncio.run(run_engine(store))
+    assert sent == [1]
+    assert store.done
+
+
+def test_failed_complete_is_retried_on_next_refill():
+    store = LeaseStore(complete_failures=1)
+    sent = asyncio.run(run_engine(store))
+    assert sent == [1, 1]  # at-least-once: terkirim ulang karena complete pertama gagal
+    assert store.done
+
+
+class BacklogStore:
+    """Banyak reminder jatuh tempo; setiap klaim mengembalikan satu batch baru."""
+
+    def __init__(self):
+        self.next_id = 0
+        self.claimed = []
+        self.completed = []
+        self.closed = False
+
+    async def reminders_due(self, after, until):
+        return []
+
+    async def claim_due_reminders(self, now, limit):
+        assert not self.closed, "klaim setelah store ditutup"
+        batch = [{"id": self.next_id + i, "user_id": 1, "channel_id": 2, "message": "hi", "send_time": now}
+                 for i in range(limit)]
+        self.next_id += limit
+        self.claimed += [r["id"] for r in batch]
+        return batch
+
+    async def complete_reminders(self, reminder_ids):
+        assert not self.closed, "complete setelah store ditutup"
+        self.completed += reminder_ids
+
+
+def test_stop_waits_for_claimed_batches_before_store_closes():
+    store = BacklogStore()
+
+    async def main():
+        async def send(reminder):
+            await asyncio.sleep(0.05)  # pengiriman lambat: stop() datang di tengah batch
+
+        engine = ReminderEngine(timedelta(minutes=10), 0.05, send, claim_batch=5, workers=2)
+        engine.start(store)
+        await asyncio.sleep(0.12)
+        await engine.stop()
+        store.closed = True
+        assert engine.drain_task.done()
+
+    asyncio.run(main())
+    assert store.claimed and sorted(store.completed) == sorted(store.claimed)
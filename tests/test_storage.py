@@ -0,0 +1,157 @@
+"""Kontrak Storage (storage/base.py) yang harus dipenuhi setiap backend. SQLite selalu jalan;
+MySQL/PostgreSQL ikut kalau DSN tes diisi (lihat conftest.py). Data memakai id acak supaya tes
+bisa diulang di database yang sama."""
+import asyncio
+import random
+from datetime import date, datetime, time as dtime, timedelta
+
+from storage.base import WIB
+
+
+def random_id():
+    return random.randint(10**15, 10**17)
+
+
+def test_todos_page_keyset(run_store):
+    user_id = random_id()
+    created_at = datetime.now(WIB)
+    # Urutan insert sengaja tidak urut tanggal: halaman harus urut (task_date, id)
+    dates = [date(2024, 1, 3), date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 1),
+             date(2024, 1, 3), date(2024, 1, 2), date(2024, 1, 4)]
+
+    async def body(store):
+        for i, task_date in enumerate(dates):
+            await store.add_todo(user_id, task_date, f"tugas {i}", created_at)
+
+        everything, more = await store.todos_page(user_id, 100)
+        assert not more
+        keys = [(r["task_date"], r["id"]) for r in everything]
+        assert keys == sorted(keys) and len(keys) == len(dates)
+
+        first, more = await store.todos_page(user_id, 3)
+        assert more and first == everything[:3]
+        last = first[-1]
+        second, more = await store.todos_page(user_id, 3, after=(last["task_date"], last["id"]))
+        assert more and second == everything[3:6]
+        last = second[-1]
+        third, more = await store.todos_page(user_id, 3, after=(last["task_date"], last["id"]))
+        assert not more and third == everything[6:]
+
+        # Mundur dari halaman kedua: kembali ke halaman pertama, urut naik, tidak ada lagi sebelumnya
+        head = second[0]
+        back, more = await store.todos_page(user_id, 3, before=(head["task_date"], head["id"]))
+        assert not more and back == first
+
+        assert await store.todos_page(random_id(), 3) == ([], False)
+
+    run_store(body)
+
+
+def test_set_todo_done_and_delete_todo_return_task_date(run_store):
+    user_id, other_user = random_id(), random_id()
+    task_date = date(2024, 2, 29)
+
+    async def body(store):
+        await store.add_todo(user_id, task_date, "tulis laporan", datetime.now(WIB))
+        (todo,), _ = await store.todos_page(user_id, 10)
+
+        assert await store.set_todo_done(other_user, todo["id"]) is None  # bukan miliknya
+        assert await store.set_todo_done(user_id, todo["id"]) == task_date
+        (todo,), _ = await store.todos_page(user_id, 10)
+        assert todo["done"] is True
+
+        assert await store.delete_todo(other_user, todo["id"]) is None
+        assert await store.delete_todo(user_id, todo["id"]) == task_date
+        assert await store.delete_todo(user_id, todo["id"]) is None
+        assert await store.set_todo_done(user_id, todo["id"]) is None
+        assert await store.todos_page(user_id, 10) == ([], False)
+
+    run_store(body)
+
+
+def test_set_checkout_is_idempotent(run_store):
+    guild_id, user_id = random_id(), random_id()
+    work_date = date(2001, 1, 1)
+    checkin = datetime(2001, 1, 1, 9, 30, tzinfo=WIB)
+    duration = timedelta(hours=8, minutes=15)
+
+    async def body(store):
+        attendance_id = await store.add_checkin(user_id, "budi", guild_id, checkin, work_date)
+        results = await asyncio.gather(*(
+            store.set_checkout(attendance_id, checkin + duration, duration) for _ in range(3)
+        ))
+        assert sorted(results) == [False, False, True]
+        assert await store.set_checkout(attendance_id, checkin + duration * 2, duration * 2) is False
+
+        record = await store.find_attendance(user_id, guild_id, work_date)
+        assert record["checkout_time"] == checkin + duration
+
+        # Rollup ikut diperbarui sekali saja, dan reconcile tidak menemukan selisih
+        (summary,) = await store.guild_attendance_summary(guild_id, work_date, work_date, dtime(9, 0))
+        assert summary["days_present"] == 1
+        assert summary["total_duration"] == duration
+        assert summary["late_count"] == 1
+        assert await store.reconcile_attendance_daily(work_date) == 0
+
+    run_store(body)
+
+
+async def delete_attendance(store, attendance_id):
+    """Storage tidak punya API hapus sesi; tiru koreksi manual admin langsung di DB."""
+    if store.name == "postgres":
+        await store.execute("DELETE FROM attendance WHERE id = $1", attendance_id)
+    else:
+        placeholder = "?" if store.name == "sqlite" else "%s"
+        await store.execute(f"DELETE FROM attendance WHERE id = {placeholder}", (attendance_id,))
+
+
+def test_reconcile_removes_rollup_of_deleted_sessions(run_store):
+    guild_id, user_id = random_id(), random_id()
+    work_date = date(2001, 1, 1)
+    checkin = datetime(2001, 1, 1, 8, 0, tzinfo=WIB)
+    duration = timedelta(hours=8)
+
+    async def body(store):
+        attendance_id = await store.add_checkin(user_id, "sari", guild_id, checkin, work_date)
+        assert await store.set_checkout(attendance_id, checkin + duration, duration)
+        assert len(await store.guild_attendance_summary(guild_id, work_date, work_date, dtime(9, 0))) == 1
+
+        await delete_attendance(store, attendance_id)
+        assert await store.reconcile_attendance_daily(work_date) > 0
+        assert await store.guild_attendance_summary(guild_id, work_date, work_date, dtime(9, 0)) == []
+        assert await store.reconcile_attendance_daily(work_date) == 0
+
+    run_store(body)
+
+
+def test_claim_due_reminders_is_exclusive(run_store):
+    user_id = random_id()
+    now = datetime(2001, 1, 2, tzinfo=WIB)
+
+    async def body(store):
+        due = {await store.add_reminder(user_id, 1, f"r{i}", now - timedelta(minutes=i)) for i in range(12)}
+        later = await store.add_reminder(user_id, 1, "nanti", now + timedelta(minutes=5))
+
+        async def claimer():
+            claimed = []
+            while True:
+                batch = await store.claim_due_reminders(now, 3)
+                if not batch:
+                    return claimed
+                send_times = [r["send_time"] for r in batch]
+                assert send_times == sorted(send_times)
+                claimed += [r["id"] for r in batch]
+
+        claims = await asyncio.gather(*(claimer() for _ in range(4)))
+        claimed = [reminder_id for batch in claims for reminder_id in batch]
+        assert len(claimed) == len(set(claimed))  # tidak ada reminder yang diklaim dua kali
+        assert due <= set(claimed)
+        assert later not in claimed
+
+        await store.complete_reminders(claimed)
+        assert await store.claim_due_reminders(now, 50) == []
+        (row,) = await store.claim_due_reminders(now + timedelta(minutes=5), 50)
+        assert row["id"] == later
+        await store.complete_reminders([later])
+
+    run_store(body)